@@ -23,6 +23,7 @@ import threading
 import time
 import base64
 import logging
+import struct
 from typing import Optional, Dict, Any, Tuple
 
 import cv2
@@ -30,6 +31,16 @@ import numpy as np
 import zmq
 import gymnasium as gym
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -46,6 +57,31 @@ CONTROL_LOOP_HZ = 60
 LINEAR_SCALE = 0.1
 ROTATION_SCALE = 0.05
 NETWORK_IDLE_SLEEP = 0.001
+VIDEO_BINARY = True  # Send video as binary frames instead of base64 inside JSON
+
+# Binary video frame header, mirrors VIDEO_FRAME_HEADER in web_control/server/core/protocol.py:
+# magic, version, width, height, JPEG quality, camera id length, then the camera id and the JPEG bytes
+VIDEO_FRAME_MAGIC = b"XLVF"
+VIDEO_FRAME_VERSION = 1
+VIDEO_FRAME_HEADER = struct.Struct("<4sBHHBB")
+
+
+# Message serializers negotiated with the web control server on ping, mirrors
+# web_control/server/core/serializers.py. Incoming messages are decoded with whichever
+# serializer produced them, so commands sent before the negotiation still decode.
+SERIALIZERS = {"json": lambda message: json.dumps(message).encode("utf-8")}
+if orjson is not None:
+    SERIALIZERS["orjson"] = lambda message: orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = lambda message: msgpack.packb(message, use_bin_type=True)
+
+
+def decode_message(raw_data: bytes) -> Dict[str, Any]:
+    """Decode a JSON or msgpack message (msgpack maps start with a map marker byte)."""
+    first = raw_data[:1]
+    if msgpack is not None and first and (0x80 <= first[0] <= 0x8f or first[0] in (0xde, 0xdf)):
+        return msgpack.unpackb(raw_data, raw=False)
+    return json.loads(raw_data.decode("utf-8"))
 
 
 def convert_tensor_to_numpy_image(tensor_image: Any) -> np.ndarray:
@@ -96,6 +132,8 @@ class XLeRobotSimHost:
         # === Simple communication: Only Queue + Event ===
         self.cmd_queue = queue.Queue(maxsize=CMD_QUEUE_MAXSIZE)
         self.response_queue = queue.Queue(maxsize=RESPONSE_QUEUE_MAXSIZE)
+        # Newest unsent video frame per camera, a newer frame replaces it instead of queueing behind it
+        self.pending_video: Dict[str, Any] = {}
         self.shutdown_event = threading.Event()
 
         # === ManiSkill components (main thread only) ===
@@ -122,6 +160,9 @@ class XLeRobotSimHost:
         # === Threading ===
         self.network_thread = None
 
+        # === Serialization: JSON until the server negotiates another serializer ===
+        self.serializer = "json"
+
         # Setup signal handlers for clean shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -197,13 +238,15 @@ class XLeRobotSimHost:
 
         try:
             # Setup ZeroMQ sockets
+            # No CONFLATE: pings and state requests must not be replaced by the next command, and
+            # their replies not by the next state push. Small high-water marks bound the backlog.
             cmd_socket = context.socket(zmq.PULL)
-            cmd_socket.setsockopt(zmq.CONFLATE, 1)
+            cmd_socket.setsockopt(zmq.RCVHWM, CMD_QUEUE_MAXSIZE)
             cmd_socket.setsockopt(zmq.RCVTIMEO, ZMQ_TIMEOUT_MS)
             cmd_socket.bind(CMD_ENDPOINT)
 
             data_socket = context.socket(zmq.PUSH)
-            data_socket.setsockopt(zmq.CONFLATE, 1)
+            data_socket.setsockopt(zmq.SNDHWM, 10)
             data_socket.setsockopt(zmq.SNDTIMEO, ZMQ_TIMEOUT_MS)
             data_socket.bind(DATA_ENDPOINT)
 
@@ -212,21 +255,21 @@ class XLeRobotSimHost:
             while not self.shutdown_event.is_set():
                 # Receive commands (non-blocking)
                 try:
-                    cmd_data = cmd_socket.recv_string(zmq.NOBLOCK)
-                    command = json.loads(cmd_data)
+                    cmd_data = cmd_socket.recv(zmq.NOBLOCK)
+                    command = decode_message(cmd_data)
                     self.cmd_queue.put_nowait(command)
                     logger.debug(f"Received command: {command.get('command', 'unknown')}")
                 except zmq.Again:
                     pass  # No data available
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Invalid JSON received: {e}")
+                except ValueError as e:
+                    logger.warning(f"Invalid message received: {e}")
                 except queue.Full:
                     logger.warning("Command queue full, dropping command")
 
                 # Send responses (non-blocking)
                 try:
                     response = self.response_queue.get_nowait()
-                    data_socket.send_string(json.dumps(response), zmq.NOBLOCK)
+                    data_socket.send(SERIALIZERS[self.serializer](response), zmq.NOBLOCK)
                     logger.debug(f"Sent response: {response.get('response', 'unknown')}")
                 except queue.Empty:
                     pass  # No data to send
@@ -237,6 +280,19 @@ class XLeRobotSimHost:
                     except queue.Full:
                         logger.warning("Response queue full, dropping response")
 
+                # Send video after replies, a frame that does not fit is dropped rather than queued
+                try:
+                    _camera_id, video = self.pending_video.popitem()
+                    if isinstance(video, bytes):
+                        data_socket.send(video, zmq.NOBLOCK)
+                    else:
+                        data_socket.send(SERIALIZERS[self.serializer](video), zmq.NOBLOCK)
+                    logger.debug("Sent video frame")
+                except KeyError:
+                    pass  # No frame to send
+                except zmq.Again:
+                    logger.debug("Data socket full, dropping video frame")
+
                 time.sleep(NETWORK_IDLE_SLEEP)  # Small delay to prevent high CPU usage
 
         except Exception as e:
@@ -266,6 +322,9 @@ class XLeRobotSimHost:
             logger.warning("Received command without type")
             return
 
+        # Replies echo the command's message ID so the server can match them to its request
+        message_id = command.get("id")
+
         try:
             if cmd_type == "move":
                 direction = data.get("direction", "stop")
@@ -276,17 +335,24 @@ class XLeRobotSimHost:
                 self.reset_robot_state()
 
             elif cmd_type == "ping":
-                self.send_response("pong", {"timestamp": time.time()})
+                # Pick the first offered serializer installed here, servers that offer none keep JSON
+                offered = data.get("serializers", [])
+                self.serializer = next((name for name in offered if name in SERIALIZERS), "json")
+                self.send_response("pong", {"timestamp": time.time(), "serializer": self.serializer}, message_id)
 
             elif cmd_type == "get_state":
                 state = self.get_robot_state()
-                self.send_response("state", state)
+                self.send_response("state", state, message_id)
 
             else:
                 logger.warning(f"Unknown command: {cmd_type}")
+                if message_id is not None:
+                    self.send_response("error", {"message": f"Unknown command: {cmd_type}"}, message_id)
 
         except Exception as e:
             logger.error(f"Error handling command {cmd_type}: {e}")
+            if message_id is not None:
+                self.send_response("error", {"message": str(e)}, message_id)
 
     def handle_move_command(self, direction: str, speed: float):
         """Handle movement command with proper stop handling"""
@@ -419,7 +485,7 @@ class XLeRobotSimHost:
             logger.error(f"Error getting robot state: {e}")
             return {"status": "error", "message": str(e), "timestamp": time.time()}
 
-    def get_video_frame(self) -> Optional[str]:
+    def get_video_frame(self) -> Optional[bytes]:
         """Get video frame from robot's virtual cameras using correct camera API"""
         if self.env is None:
             return None
@@ -457,7 +523,7 @@ class XLeRobotSimHost:
                         success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
                         if success:
                             logger.debug(f"Captured frame from {camera_name}: {frame.shape}")
-                            return base64.b64encode(buffer).decode('utf-8')
+                            return buffer.tobytes()
 
             # Fallback: try any available camera
             for camera_name, camera in scene.sensors.items():
@@ -475,7 +541,7 @@ class XLeRobotSimHost:
                         success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
                         if success:
                             logger.debug(f"Captured frame from fallback camera {camera_name}: {frame.shape}")
-                            return base64.b64encode(buffer).decode('utf-8')
+                            return buffer.tobytes()
                 except Exception:
                     continue  # Skip cameras that don't support RGB
 
@@ -486,15 +552,43 @@ class XLeRobotSimHost:
             logger.error(f"Error getting video frame from cameras: {e}")
             return None
 
-    def send_response(self, response_type: str, data: Any):
-        """Send response to queue"""
+    def send_video_frame(self, frame: bytes, width: int, height: int, quality: int, camera_id: str = "main"):
+        """Hand a video frame to the network thread, as a binary frame or a base64 JSON response"""
+        if not VIDEO_BINARY:
+            # msgpack carries the JPEG bytes as is, JSON needs base64
+            self.pending_video[camera_id] = {
+                "type": "response",
+                "response": "video",
+                "data": {
+                    "frame": frame if self.serializer == "msgpack" else base64.b64encode(frame).decode('utf-8'),
+                    "width": width,
+                    "height": height,
+                    "quality": quality,
+                    "camera_id": camera_id,
+                    "format": "jpeg"
+                },
+                "timestamp": time.time()
+            }
+            return
+
+        camera = camera_id.encode('utf-8')
+        header = VIDEO_FRAME_HEADER.pack(VIDEO_FRAME_MAGIC, VIDEO_FRAME_VERSION, width, height, quality, len(camera))
+        self.pending_video[camera_id] = b"".join((header, camera, frame))
+
+    def send_response(self, response_type: str, data: Any, message_id: Optional[int] = None):
+        """Send response to queue, replies to a command carry its message ID"""
         response = {
             "type": "response",
             "response": response_type,
             "data": data,
             "timestamp": time.time()
         }
+        if message_id is not None:
+            response["id"] = message_id
+        self._queue_response(response)
 
+    def _queue_response(self, response: Dict[str, Any]):
+        """Queue an outgoing JSON response"""
         try:
             self.response_queue.put_nowait(response)
         except queue.Full:
@@ -512,10 +606,11 @@ class XLeRobotSimHost:
         last_state_time = 0.0
         last_video_time = 0.0
         loop_count = 0
+        loop_period = 1 / CONTROL_LOOP_HZ
+        next_deadline = time.perf_counter()
 
         try:
             while not self.shutdown_event.is_set():
-                loop_start = time.time()
 
                 # Process commands from network
                 self.process_commands()
@@ -541,21 +636,17 @@ class XLeRobotSimHost:
                 if now - last_video_time >= VIDEO_PUSH_INTERVAL:
                     frame = self.get_video_frame()
                     if frame:
-                        self.send_response("video", {
-                            "frame": frame,
-                            "width": 640,
-                            "height": 480,
-                            "quality": 80,
-                            "camera_id": "main",
-                            "format": "jpeg"
-                        })
+                        self.send_video_frame(frame, 640, 480, 80)
                     last_video_time = now
 
-                # Control loop frequency (60 FPS)
-                elapsed = time.time() - loop_start
-                sleep_time = max((1 / CONTROL_LOOP_HZ) - elapsed, 0.0)
+                # Control loop frequency (60 FPS), paced against absolute deadlines so sleep errors do not drift
+                next_deadline += loop_period
+                sleep_time = next_deadline - time.perf_counter()
                 if sleep_time > 0:
                     time.sleep(sleep_time)
+                else:
+                    # Overrun: skip the missed ticks instead of running them back-to-back
+                    next_deadline = time.perf_counter()
 
                 loop_count += 1
 
@@ -14,7 +14,7 @@ import math
 
 from lerobot.robots.xlerobot import XLerobotConfig, XLerobot
 # from lerobot.robots.xlerobot import XLerobotClient, XLerobotClientConfig
-from lerobot.utils.robot_utils import busy_wait
+from lerobot.robots.xlerobot.loop_scheduler import RateScheduler
 from lerobot.utils.visualization_utils import init_rerun, log_rerun_data
 from lerobot.model.SO101Robot import SO101Kinematics
 from lerobot.teleoperators.keyboard.teleop_keyboard import KeyboardTeleop, KeyboardTeleopConfig
@@ -423,8 +423,10 @@ def main():
     left_arm.move_to_zero_position(robot)
     right_arm.move_to_zero_position(robot)
 
+    scheduler = RateScheduler(FPS)
     try:
         while True:
+            scheduler.wait()
             pressed_keys = set(keyboard.get_action().keys())
             left_key_state = {action: (key in pressed_keys) for action, key in LEFT_KEYMAP.items()}
             right_key_state = {action: (key in pressed_keys) for action, key in RIGHT_KEYMAP.items()}
@@ -474,7 +476,6 @@ def main():
             obs = robot.get_observation()
             # print(f"[MAIN] Observation: {obs}")
             log_rerun_data(obs, action)
-            # busy_wait(1.0 / FPS)
     finally:
         robot.disconnect()
         keyboard.disconnect()
@@ -14,7 +14,7 @@ import math
 import pygame
 
 from lerobot.robots.xlerobot import XLerobotConfig, XLerobot
-from lerobot.utils.robot_utils import busy_wait
+from lerobot.robots.xlerobot.loop_scheduler import RateScheduler
 from lerobot.utils.visualization_utils import _init_rerun, log_rerun_data
 from lerobot.model.SO101Robot import SO101Kinematics
 
@@ -437,8 +437,10 @@ def main():
     left_arm.move_to_zero_position(robot)
     right_arm.move_to_zero_position(robot)
 
+    scheduler = RateScheduler(FPS)
     try:
         while True:
+            scheduler.wait()
             pygame.event.pump()
             left_key_state = get_xbox_key_state(joystick, LEFT_KEYMAP)
             right_key_state = get_xbox_key_state(joystick, RIGHT_KEYMAP)
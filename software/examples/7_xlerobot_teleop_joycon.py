@@ -21,7 +21,7 @@ import numpy as np
 import math
 
 from lerobot.robots.xlerobot import XLerobotConfig, XLerobot
-from lerobot.utils.robot_utils import busy_wait
+from lerobot.robots.xlerobot.loop_scheduler import RateScheduler
 # from lerobot.utils.visualization_utils import _init_rerun, log_rerun_data
 from lerobot.model.SO101Robot import SO101Kinematics
 from joyconrobotics import JoyconRobotics
@@ -465,8 +465,10 @@ def main():
     right_arm.move_to_zero_position(robot)
     head_control.move_to_zero_position(robot)
 
+    scheduler = RateScheduler(FPS)
     try:
         while True:
+            scheduler.wait()
             pose_right, gripper_right, control_button_right = joycon_right.get_control()
             print(f"pose_right: {pose_right}, gripper_right: {gripper_right}, control_button_right: {control_button_right}")
             pose_left, gripper_left, control_button_left = joycon_left.get_control()
@@ -443,15 +443,24 @@ class JoyconRobotics:
         
         return self.posture, gripper, button_control
     
-    def solve_loop(self):
+    def solve_loop(self, hz=100):
+        # Pace the updates against absolute deadlines so the sleep overshoot does not accumulate
+        period = 1.0 / hz
+        next_deadline = time.perf_counter()
         while self.running:
             try:
                 self.update()
                 # print("solve successful")
-                time.sleep(0.01)
+                next_deadline += period
+                sleep_time = next_deadline - time.perf_counter()
+                if sleep_time > 0:
+                    time.sleep(sleep_time)
+                else:
+                    next_deadline = time.perf_counter()  # overrun, skip the missed ticks
             except Exception as e:
                 logging.error(f"Error solve_loop from device: {e}")
                 time.sleep(1)  # Wait before retrying
+                next_deadline = time.perf_counter()
                 
     def get_control(self, out_format="euler_rad"):
         if out_format == "euler_deg":
@@ -1,6 +1,10 @@
+import json
+import logging
 import math
+import os
 import numpy as np
-from typing import List, Union, Tuple
+from pathlib import Path
+from typing import List, Optional, Union, Tuple
 
 from lerobot.robots.robot import Robot
 from lerobot.robots.so101_follower.config_so101_follower import SO101FollowerConfig
@@ -10,6 +14,8 @@ from lerobot.cameras.realsense.configuration_realsense import RealSenseCameraCon
 from lerobot.cameras import ColorMode, Cv2Rotation
 from lerobot.cameras.opencv.configuration_opencv import OpenCVCameraConfig
 
+logger = logging.getLogger(__name__)
+
 def create_real_robot(port, camera_index, uid: str = "so101") -> Robot:
     """Wrapper function to map string UIDS to real robot configurations. Primarily for saving a bit of code for users when they fork the repository. They can just edit the camera, id etc. settings in this one file."""
     if uid == "so101":
@@ -41,10 +47,18 @@ class SO101Kinematics:
     All public methods use degrees for input/output.
     """
 
+    # URDF limits of joint2 (shoulder_lift) and joint3 (elbow_flex) in radians
+    JOINT2_LIMITS = (-0.1, 3.45)
+    JOINT3_LIMITS = (-0.2, math.pi)
+
     def __init__(self, l1=0.1159, l2=0.1350):
         self.l1 = l1  # Length of the first link (upper arm)
         self.l2 = l2  # Length of the second link (lower arm)
 
+        # Joint2 and joint3 offsets in theta1 and theta2, they only depend on the link geometry
+        self.theta1_offset = math.atan2(0.028, 0.11257)  # theta1 offset when joint2=0
+        self.theta2_offset = math.atan2(0.0052, 0.1349) + self.theta1_offset  # theta2 offset when joint3=0
+
     def inverse_kinematics(self, x, y, l1=None, l2=None):
         """
         Calculate inverse kinematics for a 2-link robotic arm, considering joint offsets
@@ -64,10 +78,9 @@ class SO101Kinematics:
         if l2 is None:
             l2 = self.l2
             
-        # Calculate joint2 and joint3 offsets in theta1 and theta2
-        theta1_offset = math.atan2(0.028, 0.11257)  # theta1 offset when joint2=0
-        theta2_offset = math.atan2(0.0052, 0.1349) + theta1_offset  # theta2 offset when joint3=0
-        
+        theta1_offset = self.theta1_offset
+        theta2_offset = self.theta2_offset
+
         # Calculate distance from origin to target point
         r = math.sqrt(x**2 + y**2)
         r_max = l1 + l2  # Maximum reachable distance
@@ -106,8 +119,8 @@ class SO101Kinematics:
         joint3 = theta2 + theta2_offset
         
         # Ensure angles are within URDF limits
-        joint2 = max(-0.1, min(3.45, joint2))
-        joint3 = max(-0.2, min(math.pi, joint3))
+        joint2 = max(self.JOINT2_LIMITS[0], min(self.JOINT2_LIMITS[1], joint2))
+        joint3 = max(self.JOINT3_LIMITS[0], min(self.JOINT3_LIMITS[1], joint3))
         
         # Convert from radians to degrees
         joint2_deg = math.degrees(joint2)
@@ -142,13 +155,9 @@ class SO101Kinematics:
         joint2_rad = math.radians(90 - joint2_deg)
         joint3_rad = math.radians(joint3_deg + 90)
         
-        # Calculate joint2 and joint3 offsets
-        theta1_offset = math.atan2(0.028, 0.11257)
-        theta2_offset = math.atan2(0.0052, 0.1349) + theta1_offset
-        
         # Convert joint angles back to theta1 and theta2
-        theta1 = joint2_rad - theta1_offset
-        theta2 = joint3_rad - theta2_offset
+        theta1 = joint2_rad - self.theta1_offset
+        theta2 = joint3_rad - self.theta2_offset
         
         # Forward kinematics calculations
         x = l1 * math.cos(theta1) + l2 * math.cos(theta1 + theta2 - math.pi)
@@ -156,6 +165,114 @@ class SO101Kinematics:
         
         return x, y
 
+    def inverse_kinematics_batch(self, x, y, l1=None, l2=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of `inverse_kinematics` for whole trajectories or workspace grids.
+
+        Parameters:
+            x: End effector x coordinates, array-like of any shape
+            y: End effector y coordinates, broadcastable against x
+            l1: Upper arm length (default uses instance value)
+            l2: Lower arm length (default uses instance value)
+
+        Returns:
+            joint2_deg, joint3_deg: Arrays of joint angles in degrees (shoulder_lift, elbow_flex),
+            with the same workspace and URDF limit clamping as `inverse_kinematics`
+        """
+        if l1 is None:
+            l1 = self.l1
+        if l2 is None:
+            l2 = self.l2
+
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+
+        # Scale targets outside the [|l1-l2|, l1+l2] annulus to its boundary (the origin is left as is).
+        # Scaling keeps the direction, so only the radius needs clamping.
+        r = np.hypot(x, y)
+        r = np.where(r > 0, np.clip(r, abs(l1 - l2), l1 + l2), 0.0)
+
+        # Use law of cosines to calculate theta2 (elbow angle)
+        cos_theta2 = np.clip(-(r**2 - l1**2 - l2**2) / (2 * l1 * l2), -1.0, 1.0)
+        theta2 = np.pi - np.arccos(cos_theta2)
+
+        # Calculate theta1 (shoulder angle)
+        beta = np.arctan2(y, x)
+        gamma = np.arctan2(l2 * np.sin(theta2), l1 + l2 * np.cos(theta2))
+        theta1 = beta + gamma
+
+        # Convert to joint angles within URDF limits
+        joint2 = np.clip(theta1 + self.theta1_offset, *self.JOINT2_LIMITS)
+        joint3 = np.clip(theta2 + self.theta2_offset, *self.JOINT3_LIMITS)
+
+        # Convert to degrees and apply coordinate system transformation
+        joint2_deg = 90 - np.degrees(joint2)
+        joint3_deg = np.degrees(joint3) - 90
+
+        return joint2_deg, joint3_deg
+
+    def forward_kinematics_batch(self, joint2_deg, joint3_deg, l1=None, l2=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of `forward_kinematics`.
+
+        Parameters:
+            joint2_deg: Shoulder lift joint angles in degrees, array-like of any shape
+            joint3_deg: Elbow flex joint angles in degrees, broadcastable against joint2_deg
+            l1: Upper arm length (default uses instance value)
+            l2: Lower arm length (default uses instance value)
+
+        Returns:
+            x, y: Arrays of end effector coordinates
+        """
+        if l1 is None:
+            l1 = self.l1
+        if l2 is None:
+            l2 = self.l2
+
+        theta1 = np.radians(90 - np.asarray(joint2_deg, dtype=np.float64)) - self.theta1_offset
+        theta2 = np.radians(np.asarray(joint3_deg, dtype=np.float64) + 90) - self.theta2_offset
+
+        x = l1 * np.cos(theta1) + l2 * np.cos(theta1 + theta2 - np.pi)
+        y = l1 * np.sin(theta1) + l2 * np.sin(theta1 + theta2 - np.pi)
+
+        return x, y
+
+    def is_reachable_batch(self, x, y, l1=None, l2=None) -> np.ndarray:
+        """
+        Check which targets `inverse_kinematics` reaches without any clamping.
+
+        Parameters:
+            x: End effector x coordinates, array-like of any shape
+            y: End effector y coordinates, broadcastable against x
+            l1: Upper arm length (default uses instance value)
+            l2: Lower arm length (default uses instance value)
+
+        Returns:
+            Boolean array, True where the target lies inside the [|l1-l2|, l1+l2] annulus and the
+            resulting joint angles are within the URDF limits
+        """
+        if l1 is None:
+            l1 = self.l1
+        if l2 is None:
+            l2 = self.l2
+
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        r = np.hypot(x, y)
+        in_annulus = (r >= abs(l1 - l2)) & (r <= l1 + l2) & (r > 0)
+
+        cos_theta2 = np.clip(-(r**2 - l1**2 - l2**2) / (2 * l1 * l2), -1.0, 1.0)
+        theta2 = np.pi - np.arccos(cos_theta2)
+        theta1 = np.arctan2(y, x) + np.arctan2(l2 * np.sin(theta2), l1 + l2 * np.cos(theta2))
+        joint2 = theta1 + self.theta1_offset
+        joint3 = theta2 + self.theta2_offset
+
+        return (
+            in_annulus
+            & (joint2 >= self.JOINT2_LIMITS[0])
+            & (joint2 <= self.JOINT2_LIMITS[1])
+            & (joint3 >= self.JOINT3_LIMITS[0])
+            & (joint3 <= self.JOINT3_LIMITS[1])
+        )
+
     
     def generate_sinusoidal_velocity_trajectory(
         self,
@@ -263,3 +380,185 @@ class SO101Kinematics:
     #     print("\nFirst few trajectory points:")
     #     for i in range(0, min(10, len(trajectory)), 2):
     #         print(f"t={time_array[i]:.2f}s: pos=[{trajectory[i,0]:.3f}, {trajectory[i,1]:.3f}, {trajectory[i,2]:.3f}], vel={velocities[i]:.3f} m/s")
+
+
+class SO101WorkspaceGrid:
+    """
+    Precomputed inverse kinematics lookup table over the (x, y) workspace of a SO101 arm.
+
+    The grid covers the square [-(l1+l2), l1+l2]^2 with `resolution` meter spacing and stores, per node, the
+    joint angles returned by `SO101Kinematics.inverse_kinematics` and whether the node is reachable without
+    clamping. Inside cells whose 4 nodes are all reachable, lookups bilinearly interpolate those nodes, so they
+    cost O(1) regardless of the grid size. The worst interpolation error over these cells, measured at cell
+    centers when the grid is built, is exposed as `max_error_deg`. Anywhere else (clamped targets, the origin)
+    lookups fall back to the exact solver.
+
+    Grids are saved as `.npy` files under `cache_dir`, keyed by l1, l2 and resolution, and memory-mapped on
+    later loads, so each geometry is only built once.
+    """
+
+    def __init__(
+        self,
+        kinematics: Optional[SO101Kinematics] = None,
+        resolution: float = 0.001,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
+        self.kinematics = kinematics if kinematics is not None else SO101Kinematics()
+        self.resolution = resolution
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else Path.home() / ".cache" / "xlerobot"
+
+        self.extent = self.kinematics.l1 + self.kinematics.l2
+        self.size = int(math.ceil(2 * self.extent / resolution)) + 1
+        self.joints: np.ndarray  # (size, size, 2) float32, indexed [iy, ix]
+        self.reachable: np.ndarray  # (size, size) bool, indexed [iy, ix]
+        self.max_error_deg = float("nan")
+
+        if not self._load():
+            self._build()
+            self._save()
+        self._init_lookup()
+
+    @property
+    def cache_key(self) -> str:
+        return f"so101_workspace_l1_{self.kinematics.l1:.6f}_l2_{self.kinematics.l2:.6f}_res_{self.resolution:.6f}"
+
+    def _paths(self) -> Tuple[Path, Path, Path]:
+        base = self.cache_dir / self.cache_key
+        # The key contains dots, so the extensions are appended rather than set with `with_suffix`
+        return (
+            base.with_name(base.name + ".joints.npy"),
+            base.with_name(base.name + ".reachable.npy"),
+            base.with_name(base.name + ".json"),
+        )
+
+    def _load(self) -> bool:
+        joints_path, reachable_path, meta_path = self._paths()
+        if not (joints_path.is_file() and reachable_path.is_file() and meta_path.is_file()):
+            return False
+        try:
+            self.joints = np.load(joints_path, mmap_mode="r")
+            self.reachable = np.load(reachable_path, mmap_mode="r")
+            meta = json.loads(meta_path.read_text())
+            self.max_error_deg = meta["max_error_deg"]
+        except (OSError, ValueError, KeyError):
+            return False
+        # Never pair the arrays with the metadata of another geometry
+        if (meta.get("l1"), meta.get("l2"), meta.get("resolution")) != (
+            self.kinematics.l1,
+            self.kinematics.l2,
+            self.resolution,
+        ):
+            return False
+        return self.joints.shape == (self.size, self.size, 2) and self.reachable.shape == (self.size, self.size)
+
+    def _build(self) -> None:
+        axis = -self.extent + self.resolution * np.arange(self.size)
+        xx, yy = np.meshgrid(axis, axis)
+        joint2, joint3 = self.kinematics.inverse_kinematics_batch(xx, yy)
+        self.joints = np.stack([joint2, joint3], axis=-1).astype(np.float32)
+        self.reachable = self.kinematics.is_reachable_batch(xx, yy)
+        self._init_lookup()
+
+        # Measure the interpolation error at cell centers, where it is the largest
+        centers = axis[:-1] + self.resolution / 2
+        cx, cy = np.meshgrid(centers, centers)
+        cx, cy = cx[self._cell_reachable], cy[self._cell_reachable]
+        exact2, exact3 = self.kinematics.inverse_kinematics_batch(cx, cy)
+        approx2, approx3 = self.lookup_batch(cx, cy)
+        self.max_error_deg = float(max(np.abs(approx2 - exact2).max(), np.abs(approx3 - exact3).max()))
+
+    def _init_lookup(self) -> None:
+        # A cell is only interpolated if all of its 4 nodes are reachable without clamping
+        r = np.asarray(self.reachable)
+        self._cell_reachable = r[:-1, :-1] & r[:-1, 1:] & r[1:, :-1] & r[1:, 1:]
+        # Flat views allow fast scalar access with `.item()` in `lookup`
+        self._joints_flat = np.asarray(self.joints).reshape(-1)
+        self._cell_reachable_flat = self._cell_reachable.reshape(-1)
+
+    def _save(self) -> None:
+        joints_path, reachable_path, meta_path = self._paths()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for path, array in ((joints_path, self.joints), (reachable_path, self.reachable)):
+                # Write to a temporary file first so a concurrent reader never maps a partial grid
+                tmp_path = path.with_name(path.name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp_path, path)
+            meta = {
+                "l1": self.kinematics.l1,
+                "l2": self.kinematics.l2,
+                "resolution": self.resolution,
+                "max_error_deg": self.max_error_deg,
+            }
+            meta_path.write_text(json.dumps(meta))
+        except OSError as e:
+            logger.warning(f"Could not cache SO101 workspace grid in {self.cache_dir}: {e}")
+
+    def _cell(self, x: float, y: float) -> Optional[Tuple[int, int, float, float]]:
+        """Returns the grid cell containing (x, y) if it is fully reachable, None otherwise."""
+        fx = (x + self.extent) / self.resolution
+        fy = (y + self.extent) / self.resolution
+        ix = int(math.floor(fx))
+        iy = int(math.floor(fy))
+        if not (0 <= ix < self.size - 1 and 0 <= iy < self.size - 1):
+            return None
+        if not self._cell_reachable_flat.item(iy * (self.size - 1) + ix):
+            return None
+        return ix, iy, fx - ix, fy - iy
+
+    def lookup(self, x: float, y: float) -> Tuple[float, float]:
+        """
+        Interpolated inverse kinematics for a single target.
+
+        Returns:
+            joint2_deg, joint3_deg: Joint angles in degrees (shoulder_lift, elbow_flex). Targets outside
+            fully reachable cells fall back to the exact `SO101Kinematics.inverse_kinematics`.
+        """
+        cell = self._cell(x, y)
+        if cell is None:
+            return self.kinematics.inverse_kinematics(x, y)
+        ix, iy, tx, ty = cell
+        j = self._joints_flat
+        i00 = 2 * (iy * self.size + ix)
+        i10 = i00 + 2 * self.size
+        w00 = (1 - tx) * (1 - ty)
+        w01 = tx * (1 - ty)
+        w10 = (1 - tx) * ty
+        w11 = tx * ty
+        joint2_deg = w00 * j.item(i00) + w01 * j.item(i00 + 2) + w10 * j.item(i10) + w11 * j.item(i10 + 2)
+        joint3_deg = (
+            w00 * j.item(i00 + 1) + w01 * j.item(i00 + 3) + w10 * j.item(i10 + 1) + w11 * j.item(i10 + 3)
+        )
+        return joint2_deg, joint3_deg
+
+    def lookup_batch(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized `lookup`, targets outside fully reachable cells fall back to `inverse_kinematics_batch`."""
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        fx = (x + self.extent) / self.resolution
+        fy = (y + self.extent) / self.resolution
+        inside = (fx >= 0) & (fx < self.size - 1) & (fy >= 0) & (fy < self.size - 1)
+        ix = np.clip(np.floor(fx).astype(np.int64), 0, self.size - 2)
+        iy = np.clip(np.floor(fy).astype(np.int64), 0, self.size - 2)
+        inside &= self._cell_reachable[iy, ix]
+        tx = (fx - ix)[..., None]
+        ty = (fy - iy)[..., None]
+
+        j = np.asarray(self.joints)
+        top = j[iy, ix] * (1 - tx) + j[iy, ix + 1] * tx
+        bottom = j[iy + 1, ix] * (1 - tx) + j[iy + 1, ix + 1] * tx
+        result = top * (1 - ty) + bottom * ty
+
+        if not inside.all():
+            exact2, exact3 = self.kinematics.inverse_kinematics_batch(x[~inside], y[~inside])
+            result[~inside] = np.stack([exact2, exact3], axis=-1)
+        return result[..., 0], result[..., 1]
+
+    def is_reachable(self, x: float, y: float) -> bool:
+        """
+        Conservative O(1) check that a target is reachable without clamping.
+
+        A target is reported reachable only if all 4 surrounding grid nodes are, so False may be returned
+        within one cell of the workspace boundary even though the exact target is reachable.
+        """
+        return self._cell(x, y) is not None
@@ -0,0 +1,86 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+# Feetech STS3215 velocity registers count 4096 steps per revolution
+STEPS_PER_DEG = 4096.0 / 360.0
+RAW_SPEED_MIN = -0x8000
+RAW_SPEED_MAX = 0x7FFF
+
+
+class WheelKinematics:
+    """
+    Linear mapping between body-frame velocities and raw wheel speed commands of a mobile base.
+
+    Body velocities are given in m/s for the linear components and deg/s for the rotation (the last column),
+    wheel speeds in raw motor steps/s. The forward and inverse matrices are built once, with all unit
+    conversions folded in, so each conversion is a single matrix product. Every method accepts either one
+    sample of shape (k,) or a batch of shape (N, k).
+    """
+
+    def __init__(self, wheel_matrix: np.ndarray, wheel_radius: float):
+        """
+        Parameters:
+          wheel_matrix: (n_wheels, k) matrix mapping body velocities (m/s, ..., rad/s) to wheel linear speeds (m/s).
+          wheel_radius: Radius of each wheel (meters).
+        """
+        wheel_matrix = np.asarray(wheel_matrix, dtype=np.float64)
+        # Body rotation comes in deg/s, wheel speeds go out in raw steps/s
+        body_scale = np.ones(wheel_matrix.shape[1])
+        body_scale[-1] = np.pi / 180.0
+        wheel_scale = (180.0 / np.pi) * STEPS_PER_DEG / wheel_radius
+
+        self.wheel_radius = wheel_radius
+        self.body_to_raw_matrix = wheel_scale * wheel_matrix * body_scale
+        self.raw_to_body_matrix = np.linalg.inv(self.body_to_raw_matrix)
+
+    @classmethod
+    def omniwheel(cls, wheel_radius: float = 0.05, base_radius: float = 0.125) -> "WheelKinematics":
+        """Three omniwheels mounted at 240°, 0° and 120° (with a -90° offset), body velocity (x, y, theta)."""
+        angles = np.radians(np.array([240, 0, 120]) - 90)
+        # Each row maps body velocities to a wheel's linear speed, base_radius accounts for the rotation
+        wheel_matrix = np.column_stack([np.cos(angles), np.sin(angles), np.full(3, base_radius)])
+        return cls(wheel_matrix, wheel_radius)
+
+    @classmethod
+    def differential(cls, wheel_radius: float = 0.05, wheelbase: float = 0.25) -> "WheelKinematics":
+        """Left and right wheels of a differential drive, body velocity (x, theta)."""
+        # Left wheel speed = v - ω*L/2, right wheel speed = v + ω*L/2
+        wheel_matrix = np.array([[1.0, -wheelbase / 2], [1.0, wheelbase / 2]])
+        return cls(wheel_matrix, wheel_radius)
+
+    def body_to_wheel_raw(self, body_vel: np.ndarray, max_raw: int = 3000) -> np.ndarray:
+        """
+        Convert body-frame velocities into raw wheel commands.
+
+        If any wheel command of a sample exceeds max_raw, all commands of that sample are scaled down
+        proportionally. Results are rounded and clipped to the signed 16-bit register range.
+
+        Returns:
+          An int array of shape (n_wheels,) or (N, n_wheels).
+        """
+        raw = np.asarray(body_vel, dtype=np.float64) @ self.body_to_raw_matrix.T
+        peak = np.max(np.abs(raw), axis=-1, keepdims=True)
+        scale = np.where(peak > max_raw, max_raw / np.maximum(peak, 1e-12), 1.0)
+        return np.clip(np.rint(raw * scale), RAW_SPEED_MIN, RAW_SPEED_MAX).astype(np.int64)
+
+    def wheel_raw_to_body(self, wheel_raw: np.ndarray) -> np.ndarray:
+        """
+        Convert raw wheel speed feedback back into body-frame velocities.
+
+        Returns:
+          A float array of shape (k,) or (N, k), linear components in m/s and rotation in deg/s.
+        """
+        return np.asarray(wheel_raw, dtype=np.float64) @ self.raw_to_body_matrix.T
@@ -0,0 +1,74 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class BusIOScheduler:
+    """
+    Runs motor bus transactions on one dedicated thread per serial bus.
+
+    Each bus gets a single-worker executor, so transactions on the same bus stay serialized (the bus objects
+    are not thread-safe) while transactions on independent buses overlap in time.
+    """
+
+    def __init__(self, bus_names: list[str]):
+        self.bus_names = list(bus_names)
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._executors)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}_io") for name in self.bus_names
+        }
+
+    def stop(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self._executors = {}
+
+    def submit(self, bus_name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        return self._executors[bus_name].submit(fn, *args, **kwargs)
+
+    def run(self, transactions: dict[str, Callable[[], Any]]) -> dict[str, Any]:
+        """
+        Runs one callable per bus concurrently and waits for all of them.
+
+        Parameters:
+          transactions: Mapping from bus name to a no-argument callable performing that bus's I/O.
+
+        Returns:
+          A dict with the same keys holding each callable's return value. The first exception raised by a
+          transaction is re-raised once every transaction has finished.
+        """
+        if not self.is_running:
+            return {name: fn() for name, fn in transactions.items()}
+
+        futures = {name: self.submit(name, fn) for name, fn in transactions.items()}
+        results = {}
+        error = None
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
@@ -60,11 +60,34 @@ class XLerobotConfig(RobotConfig):
     # the number of motors in your follower arms.
     max_relative_target: int | None = None
 
+    # When `max_relative_target` is set, goals are clipped against the present positions read by the latest
+    # `get_observation` call if they are at most this old, instead of reading them again from the buses.
+    # Set to `None` to always read present positions before clipping.
+    present_position_max_age_ms: int | None = 50
+
+    # `send_action` only writes goals that moved by more than a deadband since they were last written, so
+    # unchanged goals (e.g. a base standing still) do not use serial bandwidth. Position deadbands are in the
+    # normalized position unit and may be given per motor as a dict (missing motors use 0), the velocity
+    # deadband is in raw wheel steps/s. Set either to `None` to write those goals on every call.
+    goal_position_deadband: float | dict[str, float] | None = 0.0
+    goal_velocity_deadband: int | None = 0
+    # Every goal is re-written at least this often, so a write lost on the bus cannot stick. `None` disables it.
+    goal_refresh_interval_s: float | None = 1.0
+
+    # Polling rate (Hz) of the motor groups read by `get_observation`: "left_arm", "right_arm", "head" and
+    # "base". Groups without an entry are read on every call. Between two polls a group reports its previous
+    # sample, whose age is given by `XLerobot.observation_ages()`. E.g. {"head": 20, "base": 50}.
+    polling_hz: dict[str, float] = field(default_factory=dict)
+
     cameras: dict[str, CameraConfig] = field(default_factory=xlerobot_cameras_config)
 
     # Set to `True` for backward compatibility with previous policies/dataset
     use_degrees: bool = False
 
+    # Omniwheel base parameters
+    wheel_radius: float = 0.05  # Wheel radius in meters
+    base_radius: float = 0.125  # Distance from the robot center to each wheel in meters
+
     teleop_keys: dict[str, str] = field(
         default_factory=lambda: {
             # Movement
@@ -84,6 +107,15 @@ class XLerobotConfig(RobotConfig):
 
 
 
+@dataclass
+class CameraEncodingConfig:
+    # JPEG quality (1-100) used when streaming this camera
+    quality: int = 90
+    # Optional streaming resolution, frames are downscaled before encoding when both are set
+    width: int | None = None
+    height: int | None = None
+
+
 @dataclass
 class XLerobotHostConfig:
     # Network Configuration
@@ -95,9 +127,48 @@ class XLerobotHostConfig:
 
     # Watchdog: stop the robot if no command is received for over 0.5 seconds.
     watchdog_timeout_ms: int = 500
+    # Watchdog: also stop the robot if the host loop does not complete an iteration for this long (e.g. stuck
+    # in a camera read). `None`, the default, only watches for commands.
+    loop_stall_timeout_ms: int | None = None
 
     # If robot jitters decrease the frequency and monitor cpu load with `top` in cmd
     max_loop_freq_hz: int = 30
+    # What the loop does when an iteration overruns its deadline: "skip" missed ticks, "catch_up" on them, or
+    # "degrade" the rate until it keeps up (see `RateScheduler`)
+    loop_overrun_policy: str = "skip"
+    # Final part of each wait that is spun instead of slept, for sub-millisecond wake-up accuracy
+    loop_busy_wait_ms: float = 0.5
+
+    # Observation wire format: "json" (base64 frames inside a JSON string, legacy), "binary" (multipart
+    # message with a packed state vector and raw JPEG frames) or "streams" (state and each camera published
+    # as separate topics at their own rates). Must match the client.
+    observation_transport: str = "json"
+
+    # Publishing rates of the "streams" transport. `None` or a missing camera entry publishes every loop.
+    state_publish_hz: float | None = None
+    camera_publish_hz: dict[str, float] = field(default_factory=dict)
+
+    # Encode camera frames on background threads so motor control latency does not depend on image size.
+    # Streamed frames then lag the motor state by at most one encode; stale frames are dropped, not queued.
+    async_encoding: bool = True
+    encoder_workers: int = 2
+    # Per-camera JPEG settings, cameras without an entry use `CameraEncodingConfig()` defaults
+    camera_encoding: dict[str, CameraEncodingConfig] = field(default_factory=dict)
+
+    # Name of a shared-memory block the host also publishes raw observations into, for consumers on the same
+    # machine (see `shm_bus.ObservationBusReader`). `None` disables it.
+    shm_name: str | None = None
+    shm_slots: int = 4
+
+    # Command wire format: "json" (full action dict every tick, legacy) or "binary" (key order sent once, then
+    # float32 deltas of the changed keys only). Must match the client.
+    action_transport: str = "json"
+
+    # Loop profiling: the last `profile_window` durations of every loop phase are kept in memory and served as
+    # JSON on `port_zmq_stats` (see `profiling.request_loop_stats`), e.g. 5557. The endpoint binds on all
+    # interfaces, so it is disabled (`None`) unless a port is set.
+    profile_window: int = 1000
+    port_zmq_stats: int | None = None
 
 @RobotConfig.register_subclass("xlerobot_client")
 @dataclass
@@ -128,3 +199,21 @@ class XLerobotClientConfig(RobotConfig):
 
     polling_timeout_ms: int = 15
     connect_timeout_s: int = 5
+
+    # Observation wire format, must match `XLerobotHostConfig.observation_transport`.
+    observation_transport: str = "json"
+
+    # Command wire format, must match `XLerobotHostConfig.action_transport`. With "binary", the full action is
+    # re-sent every `action_keyframe_interval` ticks (together with its schema) so a restarted host resyncs.
+    action_transport: str = "json"
+    action_keyframe_interval: int = 30
+
+    # Receive observations on a background thread that keeps only the newest message, so `get_observation()`
+    # never waits on the network. When False, each call polls the socket for up to `polling_timeout_ms`.
+    receive_in_background: bool = True
+
+    # Hand out camera frames as `LazyFrame` handles that are only JPEG-decoded when first accessed (e.g. with
+    # `np.asarray`), so state-only consumers skip decoding entirely. When False, frames are decoded ndarrays.
+    lazy_frames: bool = False
+    # Decode camera frames at 1/2, 1/4 or 1/8 resolution (1 for full resolution), which is much cheaper
+    frame_decode_scale: int = 1
@@ -0,0 +1,104 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import logging
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding, which skips most of the IDCT work
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def validate_decode_scale(scale: int) -> None:
+    if scale not in DECODE_FLAGS:
+        raise ValueError(f"Unsupported frame decode scale {scale}. Must be one of {tuple(DECODE_FLAGS)}")
+
+
+def decoded_shape(height: int, width: int, scale: int = 1) -> tuple[int, int, int]:
+    """Shape of a `height`x`width` color frame decoded at 1/`scale` resolution."""
+    return (-(-height // scale), -(-width // scale), 3)
+
+
+def decode_jpeg(jpeg: Any, scale: int = 1) -> Optional[np.ndarray]:
+    """Decodes a raw JPEG buffer to an OpenCV image at 1/`scale` resolution. Returns None on failure."""
+    jpg_data = np.frombuffer(jpeg, dtype=np.uint8)
+    if jpg_data.size == 0:
+        return None
+    frame = cv2.imdecode(jpg_data, DECODE_FLAGS[scale])
+    if frame is None:
+        logger.warning("cv2.imdecode returned None for an image.")
+    return frame
+
+
+class LazyFrame:
+    """
+    A received camera frame that is only decoded when it is first accessed.
+
+    The encoded buffer is kept as received (raw JPEG, or base64 for the "json" transport) and decoded at most
+    once, so consumers that never look at a camera never pay for its decode. The handle converts to an
+    ndarray through `np.asarray(frame)`, a frame that fails to decode reads as black.
+    """
+
+    def __init__(
+        self,
+        data: Any,
+        scale: int = 1,
+        base64_encoded: bool = False,
+        fallback_shape: tuple[int, int, int] = (480, 640, 3),
+    ):
+        self._data = data
+        self.scale = scale
+        self.base64_encoded = base64_encoded
+        self.fallback_shape = fallback_shape
+        self._frame: Optional[np.ndarray] = None
+        self._decoded = False
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._decoded
+
+    def decode(self) -> Optional[np.ndarray]:
+        """Returns the decoded frame, or None if the buffer could not be decoded."""
+        if not self._decoded:
+            self._frame = self._decode()
+            self._decoded = True
+            # The encoded buffer is no longer needed and may pin a whole network message
+            self._data = None
+        return self._frame
+
+    def _decode(self) -> Optional[np.ndarray]:
+        data = self._data
+        if self.base64_encoded:
+            try:
+                data = base64.b64decode(data)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Error decoding base64 image data: {e}")
+                return None
+        return decode_jpeg(data, self.scale)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        frame = self.decode()
+        if frame is None:
+            frame = np.zeros(self.fallback_shape, dtype=np.uint8)
+        return frame if dtype is None else frame.astype(dtype)
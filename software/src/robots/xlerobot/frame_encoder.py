@@ -0,0 +1,99 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import cv2
+import numpy as np
+
+from .config_xlerobot import CameraEncodingConfig
+from .profiling import LoopProfiler
+
+logger = logging.getLogger(__name__)
+
+
+def encode_jpeg(frame: np.ndarray, encoding: CameraEncodingConfig) -> Any:
+    """JPEG-encodes a frame, resizing it first if the encoding config asks for it. Returns b"" on failure."""
+    if encoding.width is not None and encoding.height is not None:
+        if frame.shape[1] != encoding.width or frame.shape[0] != encoding.height:
+            frame = cv2.resize(frame, (encoding.width, encoding.height), interpolation=cv2.INTER_AREA)
+    ret, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), encoding.quality])
+    return buffer if ret else b""
+
+
+class AsyncFrameEncoder:
+    """
+    Encodes camera frames to JPEG on a bounded pool of worker threads.
+
+    Each camera has at most one encode in flight and one frame waiting. Submitting a frame while another one
+    is still waiting replaces it, so slow encodes drop stale frames instead of queueing them, and the caller
+    never blocks on encoding. `latest()` returns the most recent finished buffer of every camera, which lags
+    the submitted frames by at most one encode.
+    """
+
+    def __init__(
+        self,
+        cameras: list[str],
+        encoding: dict[str, CameraEncodingConfig] | None = None,
+        max_workers: int = 2,
+        profiler: LoopProfiler | None = None,
+    ):
+        encoding = encoding or {}
+        self.profiler = profiler
+        self.encoding = {cam: encoding.get(cam, CameraEncodingConfig()) for cam in cameras}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jpeg_encoder")
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+        self._pending: dict[str, np.ndarray] = {}
+        self._latest: dict[str, Any] = dict.fromkeys(cameras, b"")
+        self.dropped_frames = 0
+
+    def submit(self, cam_key: str, frame: np.ndarray) -> None:
+        with self._lock:
+            if cam_key in self._in_flight:
+                if cam_key in self._pending:
+                    self.dropped_frames += 1
+                self._pending[cam_key] = frame
+                return
+            self._in_flight.add(cam_key)
+        self._executor.submit(self._encode_loop, cam_key, frame)
+
+    def _encode_loop(self, cam_key: str, frame: np.ndarray) -> None:
+        # Keep encoding the newest waiting frame of this camera until none is left
+        while True:
+            start = time.perf_counter()
+            try:
+                buffer = encode_jpeg(frame, self.encoding[cam_key])
+            except Exception as e:
+                logger.error(f"Failed to encode {cam_key} frame: {e}")
+                buffer = b""
+            if self.profiler is not None:
+                self.profiler.record(f"encode/{cam_key}", time.perf_counter() - start)
+            with self._lock:
+                self._latest[cam_key] = buffer
+                frame = self._pending.pop(cam_key, None)
+                if frame is None:
+                    self._in_flight.discard(cam_key)
+                    return
+
+    def latest(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._latest)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
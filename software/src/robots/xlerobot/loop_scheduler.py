@@ -0,0 +1,149 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import time
+from typing import Any
+
+from .profiling import RingBuffer, summarize_ms
+
+OVERRUN_SKIP = "skip"
+OVERRUN_CATCH_UP = "catch_up"
+OVERRUN_DEGRADE = "degrade"
+OVERRUN_POLICIES = (OVERRUN_SKIP, OVERRUN_CATCH_UP, OVERRUN_DEGRADE)
+
+
+class RateScheduler:
+    """
+    Paces a loop at a fixed rate against absolute deadlines on the monotonic `time.perf_counter` clock.
+
+    Deadlines are `start + k * period`, so sleep inaccuracies never accumulate into drift. `wait()` sleeps
+    until `busy_wait_s` before the next deadline and spins for the rest, which trades a little CPU for
+    sub-millisecond wake-up accuracy. When an iteration overruns its deadline, `overrun_policy` decides:
+      - "skip": the missed ticks are dropped and the loop realigns on the next deadline of the grid.
+      - "catch_up": the missed ticks run back-to-back without waiting until the loop is on schedule again.
+      - "degrade": the period grows by `degrade_factor` (down to `min_hz`), and shrinks back once the loop
+        keeps up again for a second worth of ticks.
+
+    Call `wait()` once per iteration, before or after the loop body. `report()` summarizes the achieved rate.
+    """
+
+    def __init__(
+        self,
+        hz: float,
+        overrun_policy: str = OVERRUN_SKIP,
+        busy_wait_s: float = 0.0005,
+        min_hz: float | None = None,
+        degrade_factor: float = 1.25,
+        window: int = 1000,
+    ):
+        if hz <= 0:
+            raise ValueError(f"Loop rate must be positive, got {hz}")
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{overrun_policy}'. Must be one of {OVERRUN_POLICIES}")
+
+        self.target_period_s = 1 / hz
+        self.period_s = self.target_period_s
+        self.max_period_s = 1 / min_hz if min_hz else self.target_period_s * 4
+        self.overrun_policy = overrun_policy
+        self.busy_wait_s = busy_wait_s
+        self.degrade_factor = degrade_factor
+
+        self._next_deadline: float | None = None
+        self._last_tick: float | None = None
+        self._on_time_streak = 0
+        self._periods = RingBuffer(window)
+        self._lateness = RingBuffer(window)
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+
+    @property
+    def hz(self) -> float:
+        """Current loop rate, lower than the target rate while degraded."""
+        return 1 / self.period_s
+
+    def reset(self) -> None:
+        """Restarts the deadline grid from the next `wait()`, e.g. after a deliberate pause."""
+        self._next_deadline = None
+        self._last_tick = None
+
+    def wait(self) -> float:
+        """
+        Blocks until the next deadline.
+
+        Returns:
+          How late the loop was, in seconds, relative to the deadline it was waiting for (0 if on time).
+        """
+        now = time.perf_counter()
+        if self._next_deadline is None:
+            self._next_deadline = now
+
+        deadline = self._next_deadline
+        lateness = now - deadline
+        if lateness <= 0:
+            self._sleep_until(deadline)
+            now = time.perf_counter()
+            self._next_deadline = deadline + self.period_s
+            self._on_time()
+        else:
+            self.overruns += 1
+            self._on_time_streak = 0
+            self._next_deadline = self._schedule_after_overrun(deadline, now)
+
+        self.ticks += 1
+        self._lateness.append(max(lateness, 0.0))
+        if self._last_tick is not None:
+            self._periods.append(now - self._last_tick)
+        self._last_tick = now
+        return max(lateness, 0.0)
+
+    def _sleep_until(self, deadline: float) -> None:
+        remaining = deadline - time.perf_counter() - self.busy_wait_s
+        if remaining > 0:
+            time.sleep(remaining)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _schedule_after_overrun(self, deadline: float, now: float) -> float:
+        if self.overrun_policy == OVERRUN_CATCH_UP:
+            return deadline + self.period_s
+        if self.overrun_policy == OVERRUN_DEGRADE:
+            self.period_s = min(self.period_s * self.degrade_factor, self.max_period_s)
+            return now + self.period_s
+        # Realign on the grid: drop every tick whose deadline already passed
+        missed = math.floor((now - deadline) / self.period_s)
+        self.skipped_ticks += missed
+        return deadline + (missed + 1) * self.period_s
+
+    def _on_time(self) -> None:
+        if self.period_s == self.target_period_s:
+            return
+        self._on_time_streak += 1
+        if self._on_time_streak * self.period_s >= 1.0:
+            self.period_s = max(self.period_s / self.degrade_factor, self.target_period_s)
+            self._on_time_streak = 0
+
+    def report(self) -> dict[str, Any]:
+        periods = self._periods.values()
+        return {
+            "target_hz": 1 / self.target_period_s,
+            "current_hz": self.hz,
+            "achieved_hz": float(1 / periods.mean()) if periods.size else None,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped_ticks,
+            "period": summarize_ms(periods),
+            "lateness": summarize_ms(self._lateness.values()),
+        }
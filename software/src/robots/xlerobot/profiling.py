@@ -0,0 +1,171 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import numpy as np
+import zmq
+
+
+class RingBuffer:
+    """Fixed-size buffer of float samples, the oldest sample is overwritten once it is full."""
+
+    def __init__(self, size: int):
+        self._data = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self._data[self._index] = value
+        self._index = (self._index + 1) % len(self._data)
+        self.count += 1
+
+    def values(self) -> np.ndarray:
+        return self._data[: min(self.count, len(self._data))].copy()
+
+
+def summarize_ms(samples_s: np.ndarray) -> dict[str, float]:
+    """Mean, max and p50/p95/p99 of durations in seconds, reported in milliseconds."""
+    if samples_s.size == 0:
+        return {}
+    p50, p95, p99 = np.percentile(samples_s, [50, 95, 99]) * 1e3
+    return {
+        "mean_ms": float(samples_s.mean() * 1e3),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(samples_s.max() * 1e3),
+    }
+
+
+class LoopProfiler:
+    """
+    Records per-phase durations and loop periods of a fixed-rate control loop.
+
+    The last `window` samples of every phase are kept in ring buffers, so recording is O(1) and allocation
+    free. `report()` summarizes them as latency percentiles, together with the loop jitter (deviation of
+    the loop period from the target period) and the number of loops whose work overran the target period.
+    Phases may be recorded from other threads than the loop.
+    """
+
+    def __init__(self, target_hz: float | None = None, window: int = 1000):
+        self.target_period_s = 1 / target_hz if target_hz else None
+        self.window = window
+        self._lock = threading.Lock()
+        self._phases: dict[str, RingBuffer] = {}
+        self._periods = RingBuffer(window)
+        self._work = RingBuffer(window)
+        self._last_loop_start: float | None = None
+        self._loop_start: float | None = None
+        self.missed_deadlines = 0
+
+    def record(self, phase: str, duration_s: float) -> None:
+        with self._lock:
+            buffer = self._phases.get(phase)
+            if buffer is None:
+                buffer = self._phases[phase] = RingBuffer(self.window)
+            buffer.append(duration_s)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def start_loop(self) -> None:
+        """Marks the start of a loop iteration."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_loop_start is not None:
+                self._periods.append(now - self._last_loop_start)
+            self._last_loop_start = now
+            self._loop_start = now
+
+    def end_loop(self) -> float:
+        """Marks the end of the work of a loop iteration, before pacing. Returns the work duration in seconds."""
+        work_s = time.perf_counter() - self._loop_start
+        with self._lock:
+            self._work.append(work_s)
+            if self.target_period_s is not None and work_s > self.target_period_s:
+                self.missed_deadlines += 1
+        return work_s
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            phases = {name: (buffer.count, buffer.values()) for name, buffer in self._phases.items()}
+            periods = self._periods.values()
+            work = self._work.values()
+            loops = self._work.count
+            missed_deadlines = self.missed_deadlines
+
+        loop: dict[str, Any] = {
+            "loops": loops,
+            "missed_deadlines": missed_deadlines,
+            "work": summarize_ms(work),
+            "period": summarize_ms(periods),
+        }
+        if periods.size:
+            target = self.target_period_s if self.target_period_s is not None else float(periods.mean())
+            loop["target_period_ms"] = target * 1e3
+            loop["jitter_std_ms"] = float(periods.std() * 1e3)
+            loop["jitter_p99_ms"] = float(np.percentile(np.abs(periods - target), 99) * 1e3)
+        return {
+            "loop": loop,
+            "phases": {name: {"count": count, **summarize_ms(values)} for name, (count, values) in phases.items()},
+        }
+
+
+class StatsServer:
+    """
+    Answers loop statistics requests on a ZMQ REP socket.
+
+    `poll()` never blocks and is meant to be called once per control loop iteration, so the endpoint does
+    not need a thread of its own. Any request is answered with `LoopProfiler.report()` as JSON.
+    """
+
+    def __init__(self, zmq_context: zmq.Context, port: int, profiler: LoopProfiler):
+        self.profiler = profiler
+        self.socket = zmq_context.socket(zmq.REP)
+        self.socket.bind(f"tcp://*:{port}")
+
+    def poll(self) -> None:
+        try:
+            self.socket.recv(zmq.NOBLOCK)
+        except zmq.Again:
+            return
+        self.socket.send_string(json.dumps(self.profiler.report()))
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+def request_loop_stats(remote_ip: str, port: int, timeout_ms: int = 1000) -> dict[str, Any] | None:
+    """Fetches the loop statistics of a running host, returns None if it does not answer in time."""
+    context = zmq.Context.instance()
+    socket = context.socket(zmq.REQ)
+    socket.setsockopt(zmq.LINGER, 0)
+    socket.connect(f"tcp://{remote_ip}:{port}")
+    try:
+        socket.send(b"stats")
+        if not socket.poll(timeout_ms):
+            return None
+        return json.loads(socket.recv_string())
+    finally:
+        socket.close()
@@ -0,0 +1,100 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import zmq
+
+logger = logging.getLogger(__name__)
+
+# A raw multipart message and the `time.perf_counter()` at which it was received
+ReceivedMessage = tuple[list[zmq.Frame], float]
+
+
+def drain_latest(
+    socket: zmq.Socket, key_fn: Optional[Callable[[list[zmq.Frame]], Any]] = None
+) -> dict[Any, ReceivedMessage]:
+    """
+    Receives every message queued on `socket` without blocking and keeps only the newest one per key.
+
+    Messages are received as zero-copy frames and are not decoded, so older messages are dropped without
+    being copied. `key_fn` maps a message to its channel (e.g. its topic), by default all messages share
+    the `None` key.
+    """
+    latest = {}
+    while True:
+        try:
+            parts = socket.recv_multipart(zmq.NOBLOCK, copy=False)
+        except zmq.Again:
+            break
+        key = key_fn(parts) if key_fn is not None else None
+        latest[key] = (parts, time.perf_counter())
+    return latest
+
+
+class LatestMessageReceiver:
+    """
+    Receives messages from a ZMQ socket on a background thread, keeping only the newest raw message per key.
+
+    The thread owns the socket once started. Consumers call `take()` to collect the messages received since
+    the previous call, which never waits on the network.
+    """
+
+    def __init__(
+        self,
+        socket: zmq.Socket,
+        key_fn: Optional[Callable[[list[zmq.Frame]], Any]] = None,
+        poll_interval_ms: int = 100,
+    ):
+        self.socket = socket
+        self.key_fn = key_fn
+        self.poll_interval_ms = poll_interval_ms
+        self._lock = threading.Lock()
+        self._latest: dict[Any, ReceivedMessage] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._receive_loop, name="observation_receiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _receive_loop(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        while not self._stop_event.is_set():
+            try:
+                if not poller.poll(self.poll_interval_ms):
+                    continue
+                latest = drain_latest(self.socket, self.key_fn)
+            except zmq.ZMQError as e:
+                logger.error(f"ZMQ receive error: {e}")
+                continue
+            with self._lock:
+                self._latest.update(latest)
+
+    def take(self) -> dict[Any, ReceivedMessage]:
+        """Returns the newest message per key received since the previous call, possibly empty."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
@@ -0,0 +1,278 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared-memory observation bus for consumers running on the same machine as the robot host.
+
+The host writes every observation (state vector and raw camera frames) into a ring of slots in a
+`multiprocessing.shared_memory` block. Local readers map the block and get numpy views on the newest slot, so
+they neither go through TCP nor decode JPEGs. Remote clients keep using the ZMQ transports.
+
+Layout of the block:
+
+    header   -> struct "<4sBxxxIII4x" (magic, version, n_slots, slot_size, writer PID), then the uint64
+                sequence number of the newest complete sample (0 before the first one), then a length-prefixed
+                JSON description of the state keys and camera shapes, padded to `_DATA_OFFSET`
+    slot i   -> uint64 seqlock counter, float64 timestamp, float32 state, then one uint8 (h, w, c) frame per
+                camera at 64-byte aligned offsets
+
+Each slot is guarded by a seqlock: the writer makes its counter odd while it writes the slot and even again
+once it is done. A reader accepts a sample only if the counter was even and unchanged around its access.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"XLSH"
+_VERSION = 2
+_HEADER = struct.Struct("<4sBxxxIII4x")
+_LATEST_OFFSET = _HEADER.size
+_META_LEN = struct.Struct("<I")
+_META_OFFSET = _LATEST_OFFSET + 8
+_DATA_OFFSET = 4096
+_ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+class _Slot:
+    """Numpy views on one slot of the ring."""
+
+    def __init__(self, buf: memoryview, offset: int, n_state: int, cameras: dict[str, dict[str, Any]]):
+        self.seq = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=offset)
+        self.timestamp = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=offset + 8)
+        self.state = np.ndarray((n_state,), dtype=np.float32, buffer=buf, offset=offset + 16)
+        self.frames = {
+            name: np.ndarray(tuple(cam["shape"]), dtype=np.uint8, buffer=buf, offset=offset + cam["offset"])
+            for name, cam in cameras.items()
+        }
+
+
+def _slot_layout(n_state: int, camera_shapes: dict[str, Sequence[int]]) -> tuple[int, dict[str, dict[str, Any]]]:
+    offset = _align(16 + 4 * n_state)
+    cameras = {}
+    for name, shape in camera_shapes.items():
+        cameras[name] = {"shape": list(shape), "offset": offset}
+        offset = _align(offset + int(np.prod(shape)))
+    return offset, cameras
+
+
+class ObservationBusWriter:
+    """
+    Publishes observations into a shared-memory ring, to be read by `ObservationBusReader`s.
+
+    Parameters:
+      name: Name of the shared-memory block, readers attach to it by name.
+      state_keys: Observation keys packed, in this order, into the float32 state vector.
+      camera_shapes: (height, width, channels) of every camera frame. Frames of another shape are dropped.
+      n_slots: Ring size. A reader's sample stays valid for at least `n_slots - 1` further publishes.
+    """
+
+    def __init__(
+        self, name: str, state_keys: Sequence[str], camera_shapes: dict[str, Sequence[int]], n_slots: int = 4
+    ):
+        self.state_keys = tuple(state_keys)
+        self.n_slots = n_slots
+        self.slot_size, cameras = _slot_layout(len(self.state_keys), camera_shapes)
+        meta = json.dumps({"state_keys": list(self.state_keys), "cameras": cameras}).encode("utf-8")
+        if _META_OFFSET + _META_LEN.size + len(meta) > _DATA_OFFSET:
+            raise ValueError("Too many state keys or cameras for the shared-memory header")
+
+        size = _DATA_OFFSET + n_slots * self.slot_size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _remove_stale_block(name)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buf = self._shm.buf
+        _HEADER.pack_into(buf, 0, _MAGIC, _VERSION, n_slots, self.slot_size, os.getpid())
+        _META_LEN.pack_into(buf, _META_OFFSET, len(meta))
+        buf[_META_OFFSET + _META_LEN.size : _META_OFFSET + _META_LEN.size + len(meta)] = meta
+        self._latest = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=_LATEST_OFFSET)
+        self._latest[0] = 0
+        self._slots = [
+            _Slot(buf, _DATA_OFFSET + i * self.slot_size, len(self.state_keys), cameras) for i in range(n_slots)
+        ]
+        self._published = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def publish(self, observation: dict[str, Any], timestamp: float | None = None) -> None:
+        sequence = self._published + 1
+        slot = self._slots[sequence % self.n_slots]
+
+        slot.seq[0] += 1  # odd: slot is being written
+        slot.timestamp[0] = time.time() if timestamp is None else timestamp
+        slot.state[:] = [observation.get(key, 0.0) for key in self.state_keys]
+        for name, frame in slot.frames.items():
+            image = observation.get(name)
+            if image is None:
+                continue
+            if image.shape != frame.shape:
+                logger.warning(f"Dropping {name} frame of shape {image.shape}, the bus expects {frame.shape}")
+                continue
+            frame[...] = image
+        slot.seq[0] += 1  # even: slot is complete
+
+        self._latest[0] = sequence
+        self._published = sequence
+
+    def close(self) -> None:
+        """Releases and removes the shared-memory block."""
+        self._slots = []
+        self._latest = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SharedObservation:
+    """
+    A sample read from the bus. `state` and `frames` are views on shared memory, not copies.
+
+    The writer reuses the slot after `n_slots - 1` further publishes. Call `is_valid()` after using the views
+    to check that the slot was not overwritten meanwhile, or `copy()` the arrays to keep them.
+    """
+
+    def __init__(self, sequence: int, timestamp: float, state: np.ndarray, frames: dict[str, np.ndarray], slot, seq):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.state = state
+        self.frames = frames
+        self._slot = slot
+        self._seq = seq
+
+    def is_valid(self) -> bool:
+        return int(self._slot.seq[0]) == self._seq
+
+    def copy(self) -> "SharedObservation":
+        return SharedObservation(
+            self.sequence,
+            self.timestamp,
+            self.state.copy(),
+            {name: frame.copy() for name, frame in self.frames.items()},
+            self._slot,
+            self._seq,
+        )
+
+
+class ObservationBusReader:
+    """Maps an `ObservationBusWriter`'s shared-memory block and reads its newest sample without copies."""
+
+    def __init__(self, name: str):
+        self._shm = _attach(name)
+        buf = self._shm.buf
+        magic, version, self.n_slots, slot_size, _writer_pid = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._shm.close()
+            raise ValueError(f"Shared memory '{name}' is not an observation bus ({magic!r} v{version})")
+        (meta_len,) = _META_LEN.unpack_from(buf, _META_OFFSET)
+        start = _META_OFFSET + _META_LEN.size
+        meta = json.loads(bytes(buf[start : start + meta_len]).decode("utf-8"))
+
+        self.state_keys = tuple(meta["state_keys"])
+        self.camera_shapes = {name: tuple(cam["shape"]) for name, cam in meta["cameras"].items()}
+        self._latest = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=_LATEST_OFFSET)
+        self._slots = [
+            _Slot(buf, _DATA_OFFSET + i * slot_size, len(self.state_keys), meta["cameras"])
+            for i in range(self.n_slots)
+        ]
+
+    def latest(self, max_retries: int = 100) -> SharedObservation | None:
+        """Returns the newest complete sample, or None if nothing was published yet."""
+        for _ in range(max_retries):
+            sequence = int(self._latest[0])
+            if sequence == 0:
+                return None
+            slot = self._slots[sequence % self.n_slots]
+            seq = int(slot.seq[0])
+            if seq % 2:
+                continue  # being overwritten, the newest sample moved on
+            timestamp = float(slot.timestamp[0])
+            if int(slot.seq[0]) == seq:
+                return SharedObservation(sequence, timestamp, slot.state, dict(slot.frames), slot, seq)
+        return None
+
+    def close(self) -> None:
+        # Views on the buffer must be released before the mapping can be closed
+        self._slots = []
+        self._latest = None
+        self._shm.close()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user
+        return True
+    return True
+
+
+def _remove_stale_block(name: str) -> None:
+    """
+    Unlinks an existing observation bus block whose writer exited without removing it.
+
+    Raises:
+        FileExistsError: if the block is not an observation bus of this version, or its writer is still running.
+    """
+    shm = _attach(name)
+    try:
+        if shm.size < _HEADER.size:
+            magic, version, pid = b"", 0, 0
+        else:
+            magic, version, _n_slots, _slot_size, pid = _HEADER.unpack_from(shm.buf, 0)
+    finally:
+        shm.close()
+
+    if magic != _MAGIC or version != _VERSION:
+        raise FileExistsError(
+            f"Shared memory '{name}' exists and is not an observation bus ({magic!r} v{version}). "
+            f"Choose another name or remove /dev/shm/{name.lstrip('/')}."
+        )
+    if pid != os.getpid() and _process_alive(pid):
+        raise FileExistsError(
+            f"Shared memory '{name}' is in use by a running host (PID {pid}). Stop it or choose another name."
+        )
+
+    # Readers still mapping the stale block keep their mapping until they close it
+    logger.warning(f"Replacing stale shared-memory block {name!r} of exited host (PID {pid})")
+    stale = shared_memory.SharedMemory(name=name)
+    stale.close()
+    stale.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Readers must not unlink the block when they exit, only the writer owns it. Before Python 3.13 the resource
+    # tracker registers attached blocks too, so the reader unregisters it (readers belong in other processes).
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
@@ -0,0 +1,264 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Binary observation transports shared by `XLerobotHost` and `XLerobotClient`.
+
+With the "binary" transport, an observation is sent as one ZMQ multipart message:
+
+    frame 0: header   -> struct "<4sBHH" (magic, version, n_state, n_cameras)
+                         followed by one length-prefixed utf-8 name per camera
+    frame 1: state    -> n_state little-endian float32 values, in the robot's action feature order
+    frame 2+: images  -> one raw JPEG buffer per camera (empty if encoding failed)
+
+This avoids the base64 and JSON round trip of the legacy "json" transport.
+
+The "streams" transport publishes the state and every camera as separate topics on a PUB socket, each at its
+own rate, so slow camera encoding never throttles the state stream:
+
+    state:          [b"state", header struct "<4sBHd" (magic, version, n_state, timestamp), float32 state]
+    camera <name>:  [b"camera/<name>", timestamp struct "<d", raw JPEG buffer]
+
+Actions sent by the client use the "binary" action transport: the key order is sent once as a schema message,
+then every tick sends one single-frame delta message:
+
+    schema:  struct "<4sBI" (magic, version, schema id) followed by the "\n"-joined utf-8 keys
+    delta:   struct "<4sBIH" (magic, version, schema id, n_keys), a bit mask of ceil(n_keys / 8) bytes
+             marking the keys that changed, then one little-endian float32 value per marked key
+
+The schema id is the CRC32 of the schema, so the host ignores deltas it cannot interpret until it has seen a
+matching schema. A delta with an empty mask is a plain keep-alive.
+"""
+
+import struct
+import zlib
+from typing import Any, Sequence
+
+import numpy as np
+
+TRANSPORT_JSON = "json"
+TRANSPORT_BINARY = "binary"
+TRANSPORT_STREAMS = "streams"
+TRANSPORTS = (TRANSPORT_JSON, TRANSPORT_BINARY, TRANSPORT_STREAMS)
+ACTION_TRANSPORTS = (TRANSPORT_JSON, TRANSPORT_BINARY)
+
+STATE_TOPIC = b"state"
+CAMERA_TOPIC_PREFIX = b"camera/"
+
+_MAGIC = b"XLRO"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBHH")
+_NAME_LEN = struct.Struct("<H")
+_STATE_HEADER = struct.Struct("<4sBHd")
+_TIMESTAMP = struct.Struct("<d")
+
+_ACTION_SCHEMA_MAGIC = b"XLRS"
+_ACTION_MAGIC = b"XLRA"
+_ACTION_SCHEMA_HEADER = struct.Struct("<4sBI")
+_ACTION_HEADER = struct.Struct("<4sBIH")
+
+
+def validate_transport(transport: str) -> None:
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown observation transport '{transport}'. Must be one of {TRANSPORTS}")
+
+
+def validate_action_transport(transport: str) -> None:
+    if transport not in ACTION_TRANSPORTS:
+        raise ValueError(f"Unknown action transport '{transport}'. Must be one of {ACTION_TRANSPORTS}")
+
+
+def encode_observation_binary(
+    state_order: Sequence[str], observation: dict[str, Any], jpeg_frames: dict[str, Any]
+) -> list[Any]:
+    """Pack a state dict and already JPEG-encoded frames into multipart frames.
+
+    `jpeg_frames` values may be any buffer-protocol object (e.g. the ndarray returned by `cv2.imencode`),
+    so they can be handed to `send_multipart(..., copy=False)` without an intermediate copy.
+    """
+    header = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(state_order), len(jpeg_frames)))
+    for cam_name in jpeg_frames:
+        name = cam_name.encode("utf-8")
+        header += _NAME_LEN.pack(len(name))
+        header += name
+
+    state = np.asarray([observation.get(key, 0.0) for key in state_order], dtype="<f4")
+    return [bytes(header), state, *jpeg_frames.values()]
+
+
+def decode_observation_binary(parts: Sequence[Any]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Unpack multipart frames into a float32 state vector and raw JPEG buffers.
+
+    `parts` may be `bytes` or `zmq.Frame` objects. The returned arrays are views on the received buffers.
+
+    Raises:
+        ValueError: if the message is not a well formed binary observation.
+    """
+    if len(parts) < 2:
+        raise ValueError(f"Binary observation needs at least 2 frames, got {len(parts)}")
+
+    header = memoryview(_buffer(parts[0]))
+    if len(header) < _HEADER.size:
+        raise ValueError("Binary observation header is truncated")
+    magic, version, n_state, n_cameras = _HEADER.unpack_from(header)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Unsupported binary observation header {magic!r} v{version}")
+    if len(parts) != 2 + n_cameras:
+        raise ValueError(f"Binary observation expected {2 + n_cameras} frames, got {len(parts)}")
+
+    offset = _HEADER.size
+    cam_names = []
+    for _ in range(n_cameras):
+        (name_len,) = _NAME_LEN.unpack_from(header, offset)
+        offset += _NAME_LEN.size
+        cam_names.append(bytes(header[offset : offset + name_len]).decode("utf-8"))
+        offset += name_len
+
+    state = np.frombuffer(_buffer(parts[1]), dtype="<f4")
+    if state.size != n_state:
+        raise ValueError(f"Binary observation expected {n_state} state values, got {state.size}")
+
+    frames = {
+        name: np.frombuffer(_buffer(part), dtype=np.uint8)
+        for name, part in zip(cam_names, parts[2:], strict=True)
+    }
+    return state, frames
+
+
+def encode_state_message(state_order: Sequence[str], observation: dict[str, Any], timestamp: float) -> list[Any]:
+    """Pack the state of an observation as a "streams" state message."""
+    header = _STATE_HEADER.pack(_MAGIC, _VERSION, len(state_order), timestamp)
+    state = np.asarray([observation.get(key, 0.0) for key in state_order], dtype="<f4")
+    return [STATE_TOPIC, header, state]
+
+
+def encode_camera_message(cam_name: str, jpeg_frame: Any, timestamp: float) -> list[Any]:
+    """Pack an already JPEG-encoded frame as a "streams" camera message."""
+    return [CAMERA_TOPIC_PREFIX + cam_name.encode("utf-8"), _TIMESTAMP.pack(timestamp), jpeg_frame]
+
+
+def decode_stream_message(parts: Sequence[Any]) -> tuple[str | None, float, np.ndarray]:
+    """Unpack a "streams" message.
+
+    Returns:
+        (camera name or None for the state topic, host timestamp, payload array). The payload is the float32
+        state vector for the state topic and the raw JPEG buffer for camera topics.
+
+    Raises:
+        ValueError: if the message is not a well formed stream message.
+    """
+    if len(parts) != 3:
+        raise ValueError(f"Stream message needs 3 frames, got {len(parts)}")
+    topic = bytes(_buffer(parts[0]))
+
+    if topic == STATE_TOPIC:
+        header = _buffer(parts[1])
+        if len(header) != _STATE_HEADER.size:
+            raise ValueError("Stream state header is truncated")
+        magic, version, n_state, timestamp = _STATE_HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported stream state header {magic!r} v{version}")
+        state = np.frombuffer(_buffer(parts[2]), dtype="<f4")
+        if state.size != n_state:
+            raise ValueError(f"Stream state expected {n_state} values, got {state.size}")
+        return None, timestamp, state
+
+    if topic.startswith(CAMERA_TOPIC_PREFIX):
+        (timestamp,) = _TIMESTAMP.unpack(_buffer(parts[1]))
+        cam_name = topic[len(CAMERA_TOPIC_PREFIX) :].decode("utf-8")
+        return cam_name, timestamp, np.frombuffer(_buffer(parts[2]), dtype=np.uint8)
+
+    raise ValueError(f"Unknown stream topic {topic!r}")
+
+
+def action_schema_id(keys: Sequence[str]) -> int:
+    return zlib.crc32("\n".join(keys).encode("utf-8"))
+
+
+def encode_action_schema(keys: Sequence[str]) -> bytes:
+    """Pack the action key order of the "binary" action transport."""
+    return _ACTION_SCHEMA_HEADER.pack(_ACTION_SCHEMA_MAGIC, _VERSION, action_schema_id(keys)) + "\n".join(
+        keys
+    ).encode("utf-8")
+
+
+def encode_action_delta(schema_id: int, values: np.ndarray, mask: np.ndarray) -> bytes:
+    """Pack the `values` selected by the boolean `mask` as a "binary" action delta."""
+    header = _ACTION_HEADER.pack(_ACTION_MAGIC, _VERSION, schema_id, len(values))
+    return header + np.packbits(mask).tobytes() + np.asarray(values, dtype="<f4")[mask].tobytes()
+
+
+class ActionDeltaDecoder:
+    """
+    Rebuilds the full action vector from "binary" action schema and delta messages.
+
+    Deltas must all be applied, in order, since each one only carries the keys that changed.
+    """
+
+    def __init__(self):
+        self.keys: tuple[str, ...] = ()
+        self.schema_id: int | None = None
+        self.values: np.ndarray | None = None
+        # Keys that received a value since the schema was set, the others hold a placeholder 0.0
+        self.commanded: np.ndarray | None = None
+
+    def apply(self, message: Any) -> np.ndarray | None:
+        """
+        Applies a schema or delta message.
+
+        Returns:
+          The indices of the keys updated by a delta (possibly empty), or None for a schema message or a delta
+          that cannot be applied yet because its schema is unknown.
+
+        Raises:
+            ValueError: if the message is not a well formed action message.
+        """
+        data = memoryview(_buffer(message))
+        magic = bytes(data[:4])
+
+        if magic == _ACTION_SCHEMA_MAGIC:
+            _magic, version, schema_id = _ACTION_SCHEMA_HEADER.unpack_from(data)
+            if version != _VERSION:
+                raise ValueError(f"Unsupported action schema version {version}")
+            if schema_id != self.schema_id:
+                keys = bytes(data[_ACTION_SCHEMA_HEADER.size :]).decode("utf-8")
+                self.keys = tuple(keys.split("\n")) if keys else ()
+                self.schema_id = schema_id
+                self.values = np.zeros(len(self.keys), dtype=np.float32)
+                self.commanded = np.zeros(len(self.keys), dtype=bool)
+            return None
+
+        if magic != _ACTION_MAGIC:
+            raise ValueError(f"Unknown action message {magic!r}")
+        _magic, version, schema_id, n_keys = _ACTION_HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported action version {version}")
+        if schema_id != self.schema_id:
+            return None
+
+        mask_size = (n_keys + 7) // 8
+        offset = _ACTION_HEADER.size
+        mask = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=mask_size, offset=offset), count=n_keys)
+        indices = np.flatnonzero(mask)
+        values = np.frombuffer(data, dtype="<f4", offset=offset + mask_size)
+        if n_keys != len(self.keys) or values.size != indices.size:
+            raise ValueError(f"Action delta expected {indices.size} values for {n_keys} keys, got {values.size}")
+        self.values[indices] = values
+        self.commanded[indices] = True
+        return indices
+
+
+def _buffer(part: Any) -> Any:
+    # zmq.Frame exposes its payload through `.buffer` when received with copy=False
+    return getattr(part, "buffer", part)
@@ -0,0 +1,97 @@
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Watchdog:
+    """
+    Detects command starvation and control loop stalls on a thread of its own.
+
+    The control loop calls `feed_command()` whenever it applies a command and `feed_loop()` once per iteration.
+    If no command was applied for `command_timeout_s`, or the loop did not complete an iteration for
+    `loop_timeout_s`, `on_trigger` is called once from the watchdog thread with the reason. Because the check
+    does not depend on the loop's timing, the stop latency is bounded by the timeouts plus `check_interval_s`,
+    even while the loop is stuck. The watchdog re-arms on the next applied command.
+    """
+
+    def __init__(
+        self,
+        on_trigger: Callable[[str], None],
+        command_timeout_s: float,
+        loop_timeout_s: float | None = None,
+        check_interval_s: float = 0.01,
+    ):
+        self.on_trigger = on_trigger
+        self.command_timeout_s = command_timeout_s
+        self.loop_timeout_s = loop_timeout_s
+        self.check_interval_s = check_interval_s
+
+        now = time.perf_counter()
+        self._last_command = now
+        self._last_loop = now
+        self._triggered = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def triggered(self) -> bool:
+        return self._triggered.is_set()
+
+    def feed_command(self) -> None:
+        self._last_command = time.perf_counter()
+        self._triggered.clear()
+
+    def feed_loop(self) -> None:
+        self._last_loop = time.perf_counter()
+
+    def start(self) -> None:
+        self._last_command = self._last_loop = time.perf_counter()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.check_interval_s):
+            if self._triggered.is_set():
+                continue
+            reason = self._check(time.perf_counter())
+            if reason is None:
+                continue
+            self._triggered.set()
+            try:
+                self.on_trigger(reason)
+            except Exception as e:
+                logger.error(f"Watchdog stop failed: {e}")
+
+    def _check(self, now: float) -> str | None:
+        command_age_s = now - self._last_command
+        if command_age_s > self.command_timeout_s:
+            return f"Command not received for more than {self.command_timeout_s * 1000:.0f} milliseconds"
+        if self.loop_timeout_s is not None:
+            loop_age_s = now - self._last_loop
+            if loop_age_s > self.loop_timeout_s:
+                return f"Control loop stalled for more than {self.loop_timeout_s * 1000:.0f} milliseconds"
+        return None
@@ -16,7 +16,8 @@
 
 import logging
 import time
-from functools import cached_property
+from concurrent.futures import Future
+from functools import cached_property, partial
 from itertools import chain
 from typing import Any
 
@@ -32,7 +33,10 @@ from lerobot.motors.feetech import (
 
 from ..robot import Robot
 from ..utils import ensure_safe_goal_position
+from .base_kinematics import WheelKinematics
+from .bus_io import BusIOScheduler
 from .config_xlerobot import XLerobotConfig
+from .profiling import LoopProfiler
 
 logger = logging.getLogger(__name__)
 
@@ -125,7 +129,32 @@ class XLerobot(Robot):
         self.right_arm_motors = [motor for motor in self.bus2.motors if motor.startswith("right_arm")]
         self.head_motors = [motor for motor in self.bus1.motors if motor.startswith("head")]
         self.base_motors = [motor for motor in self.bus2.motors if motor.startswith("base")]
+        self.motor_groups = {
+            "left_arm": self.left_arm_motors,
+            "head": self.head_motors,
+            "right_arm": self.right_arm_motors,
+            "base": self.base_motors,
+        }
+        unknown_groups = set(config.polling_hz) - set(self.motor_groups)
+        if unknown_groups:
+            raise ValueError(f"Unknown motor groups in polling_hz: {sorted(unknown_groups)}")
         self.cameras = make_cameras_from_configs(config.cameras)
+        # bus1 and bus2 are independent serial ports, so their transactions can run concurrently
+        self.bus_io = BusIOScheduler(["bus1", "bus2"])
+        self.base_kinematics = WheelKinematics.omniwheel(config.wheel_radius, config.base_radius)
+        # Present positions from the latest observation, reused by send_action for safety clipping
+        self._present_pos_cache: dict[str, float] = {}
+        self._present_pos_timestamp = 0.0
+        # Latest sample of each motor group and the `time.perf_counter()` at which it was read
+        self._group_state: dict[str, dict[str, float]] = {}
+        self._group_sample_time: dict[str, float] = {}
+        # Goals last written to each motor ("<motor>" keys, positions and raw wheel velocities)
+        self._written_goals: dict[str, float] = {}
+        self._goals_refreshed_at = 0.0
+        # Set when goals were overwritten outside of send_action (e.g. a watchdog stop), all goals are re-sent
+        self._refresh_requested = False
+        # Optional profiler collecting bus and camera read timings, set by the host
+        self.profiler: LoopProfiler | None = None
 
     @property
     def _state_ft(self) -> dict[str, type]:
@@ -215,6 +244,7 @@ class XLerobot(Robot):
             cam.connect()
 
         self.configure()
+        self.bus_io.start()
         logger.info(f"{self} connected.")
 
     @property
@@ -335,6 +365,7 @@ class XLerobot(Robot):
         
         self.bus1.enable_torque()
         self.bus2.enable_torque()
+        self._written_goals.clear()
         
 
     def setup_motors(self) -> None:
@@ -374,8 +405,6 @@ class XLerobot(Robot):
         x: float,
         y: float,
         theta: float,
-        wheel_radius: float = 0.05,
-        base_radius: float = 0.125,
         max_raw: int = 3000,
     ) -> dict:
         """
@@ -385,8 +414,6 @@ class XLerobot(Robot):
           x_cmd      : Linear velocity in x (m/s).
           y_cmd      : Linear velocity in y (m/s).
           theta_cmd  : Rotational velocity (deg/s).
-          wheel_radius: Radius of each wheel (meters).
-          base_radius : Distance from the center of rotation to each wheel (meters).
           max_raw    : Maximum allowed raw command (ticks) per wheel.
 
         Returns:
@@ -394,44 +421,16 @@ class XLerobot(Robot):
              {"base_left_wheel": value, "base_back_wheel": value, "base_right_wheel": value}.
 
         Notes:
-          - Internally, the method converts theta_cmd to rad/s for the kinematics.
-          - The raw command is computed from the wheels angular speed in deg/s
-            using _degps_to_raw(). If any command exceeds max_raw, all commands
-            are scaled down proportionally.
+          - The kinematic matrices are precomputed in `self.base_kinematics` from `config.wheel_radius`
+            and `config.base_radius`. If any command exceeds max_raw, all commands are scaled down
+            proportionally.
         """
-        # Convert rotational velocity from deg/s to rad/s.
-        theta_rad = theta * (np.pi / 180.0)
-        # Create the body velocity vector [x, y, theta_rad].
-        velocity_vector = np.array([x, y, theta_rad])
-
-        # Define the wheel mounting angles with a -90° offset.
-        angles = np.radians(np.array([240, 0, 120]) - 90)
-        # Build the kinematic matrix: each row maps body velocities to a wheel’s linear speed.
-        # The third column (base_radius) accounts for the effect of rotation.
-        m = np.array([[np.cos(a), np.sin(a), base_radius] for a in angles])
-
-        # Compute each wheel’s linear speed (m/s) and then its angular speed (rad/s).
-        wheel_linear_speeds = m.dot(velocity_vector)
-        wheel_angular_speeds = wheel_linear_speeds / wheel_radius
-
-        # Convert wheel angular speeds from rad/s to deg/s.
-        wheel_degps = wheel_angular_speeds * (180.0 / np.pi)
-
-        # Scaling
-        steps_per_deg = 4096.0 / 360.0
-        raw_floats = [abs(degps) * steps_per_deg for degps in wheel_degps]
-        max_raw_computed = max(raw_floats)
-        if max_raw_computed > max_raw:
-            scale = max_raw / max_raw_computed
-            wheel_degps = wheel_degps * scale
-
-        # Convert each wheel’s angular speed (deg/s) to a raw integer.
-        wheel_raw = [self._degps_to_raw(deg) for deg in wheel_degps]
+        wheel_raw = self.base_kinematics.body_to_wheel_raw(np.array([x, y, theta]), max_raw=max_raw)
 
         return {
-            "base_left_wheel": wheel_raw[0],
-            "base_back_wheel": wheel_raw[1],
-            "base_right_wheel": wheel_raw[2],
+            "base_left_wheel": int(wheel_raw[0]),
+            "base_back_wheel": int(wheel_raw[1]),
+            "base_right_wheel": int(wheel_raw[2]),
         }
 
     def _wheel_raw_to_body(
@@ -439,44 +438,19 @@ class XLerobot(Robot):
         left_wheel_speed,
         back_wheel_speed,
         right_wheel_speed,
-        wheel_radius: float = 0.05,
-        base_radius: float = 0.125,
     ) -> dict[str, Any]:
         """
         Convert wheel raw command feedback back into body-frame velocities.
 
         Parameters:
-          wheel_raw   : Vector with raw wheel commands ("base_left_wheel", "base_back_wheel", "base_right_wheel").
-          wheel_radius: Radius of each wheel (meters).
-          base_radius : Distance from the robot center to each wheel (meters).
+          left_wheel_speed, back_wheel_speed, right_wheel_speed : Raw wheel speeds.
 
         Returns:
-          A dict (x.vel, y.vel, theta.vel) all in m/s
+          A dict (x.vel, y.vel, theta.vel) in m/s and deg/s
         """
-
-        # Convert each raw command back to an angular speed in deg/s.
-        wheel_degps = np.array(
-            [
-                self._raw_to_degps(left_wheel_speed),
-                self._raw_to_degps(back_wheel_speed),
-                self._raw_to_degps(right_wheel_speed),
-            ]
+        x, y, theta = self.base_kinematics.wheel_raw_to_body(
+            np.array([left_wheel_speed, back_wheel_speed, right_wheel_speed])
         )
-
-        # Convert from deg/s to rad/s.
-        wheel_radps = wheel_degps * (np.pi / 180.0)
-        # Compute each wheel’s linear speed (m/s) from its angular speed.
-        wheel_linear_speeds = wheel_radps * wheel_radius
-
-        # Define the wheel mounting angles with a -90° offset.
-        angles = np.radians(np.array([240, 0, 120]) - 90)
-        m = np.array([[np.cos(a), np.sin(a), base_radius] for a in angles])
-
-        # Solve the inverse kinematics: body_velocity = M⁻¹ · wheel_linear_speeds.
-        m_inv = np.linalg.inv(m)
-        velocity_vector = m_inv.dot(wheel_linear_speeds)
-        x, y, theta_rad = velocity_vector
-        theta = theta_rad * (180.0 / np.pi)
         return {
             "x.vel": x,
             "y.vel": y,
@@ -518,17 +492,86 @@ class XLerobot(Robot):
             "theta.vel": theta_cmd,
         }
 
+    def _read_bus1_state(self, groups: list[str]) -> dict[str, dict[str, float]]:
+        # Left arm and head share the same register, so a single sync_read covers both
+        motors = [motor for group in groups for motor in self.motor_groups[group]]
+        if not motors:
+            return {}
+        pos = self.bus1.sync_read("Present_Position", motors)
+        return {group: {k: pos[k] for k in self.motor_groups[group]} for group in groups}
+
+    def _read_bus2_state(self, groups: list[str]) -> dict[str, dict[str, float]]:
+        state = {}
+        if "right_arm" in groups:
+            state["right_arm"] = self.bus2.sync_read("Present_Position", self.right_arm_motors)
+        if "base" in groups:
+            state["base"] = self.bus2.sync_read("Present_Velocity", self.base_motors)
+        return state
+
+    def _groups_due(self, now: float) -> list[str]:
+        """Returns the motor groups whose polling period elapsed (or that were never read)."""
+        due = []
+        for group in self.motor_groups:
+            rate_hz = self.config.polling_hz.get(group)
+            last = self._group_sample_time.get(group)
+            if not rate_hz or last is None or now - last >= 1 / rate_hz:
+                due.append(group)
+        return due
+
+    def observation_ages(self) -> dict[str, float]:
+        """Seconds since each motor group was last read from the bus."""
+        now = time.perf_counter()
+        return {group: now - sample_time for group, sample_time in self._group_sample_time.items()}
+
+    def _read_present_pos(self) -> dict[str, float]:
+        """
+        Returns the present arm and head positions, keyed like the action features ("<motor>.pos").
+
+        Positions cached by the latest `get_observation` call are reused while they are younger than
+        `config.present_position_max_age_ms`, otherwise both buses are read again.
+        """
+        max_age_ms = self.config.present_position_max_age_ms
+        if max_age_ms is not None and self._present_pos_cache:
+            age_ms = (time.perf_counter() - self._present_pos_timestamp) * 1e3
+            if age_ms <= max_age_ms:
+                return self._present_pos_cache
+
+        bus_reads = self.bus_io.run(
+            {
+                "bus1": lambda: self.bus1.sync_read("Present_Position", self.left_arm_motors + self.head_motors),
+                "bus2": lambda: self.bus2.sync_read("Present_Position", self.right_arm_motors),
+            }
+        )
+        present_pos = {f"{k}.pos": v for k, v in chain(bus_reads["bus1"].items(), bus_reads["bus2"].items())}
+        self._present_pos_cache = present_pos
+        self._present_pos_timestamp = time.perf_counter()
+        return present_pos
+
     def get_observation(self) -> dict[str, Any]:
         if not self.is_connected:
             raise DeviceNotConnectedError(f"{self} is not connected.")
 
-        # Read actuators position for arm and vel for base
+        # Read actuators position for arm and vel for base, both buses in parallel
         start = time.perf_counter()
-        left_arm_pos = self.bus1.sync_read("Present_Position", self.left_arm_motors)
-        right_arm_pos = self.bus2.sync_read("Present_Position", self.right_arm_motors)
-        head_pos = self.bus1.sync_read("Present_Position", self.head_motors)
-        base_wheel_vel = self.bus2.sync_read("Present_Velocity", self.base_motors)
-        
+        # Only the groups due at their polling rate are read, the others keep their previous sample
+        due = self._groups_due(start)
+        bus_reads = self.bus_io.run(
+            {
+                "bus1": lambda: self._read_bus1_state([g for g in due if g in ("left_arm", "head")]),
+                "bus2": lambda: self._read_bus2_state([g for g in due if g in ("right_arm", "base")]),
+            }
+        )
+        sample_time = time.perf_counter()
+        for group_state in bus_reads.values():
+            for group, values in group_state.items():
+                self._group_state[group] = values
+                self._group_sample_time[group] = sample_time
+
+        left_arm_pos = self._group_state["left_arm"]
+        head_pos = self._group_state["head"]
+        right_arm_pos = self._group_state["right_arm"]
+        base_wheel_vel = self._group_state["base"]
+
         base_vel = self._wheel_raw_to_body(
             base_wheel_vel["base_left_wheel"],
             base_wheel_vel["base_back_wheel"],
@@ -540,16 +583,22 @@ class XLerobot(Robot):
         head_state = {f"{k}.pos": v for k, v in head_pos.items()}
         # Combine all arm and head states
         obs_dict = {**left_arm_state, **right_arm_state, **head_state, **base_vel}
+        self._present_pos_cache = {**left_arm_state, **right_arm_state, **head_state}
+        self._present_pos_timestamp = min(self._group_sample_time[g] for g in ("left_arm", "right_arm", "head"))
 
-        dt_ms = (time.perf_counter() - start) * 1e3
-        logger.debug(f"{self} read state: {dt_ms:.1f}ms")
+        dt_s = time.perf_counter() - start
+        logger.debug(f"{self} read state: {dt_s * 1e3:.1f}ms")
+        if self.profiler is not None:
+            self.profiler.record("bus_read", dt_s)
 
         # Capture images from cameras
         for cam_key, cam in self.cameras.items():
             start = time.perf_counter()
             obs_dict[cam_key] = cam.async_read()
-            dt_ms = (time.perf_counter() - start) * 1e3
-            logger.debug(f"{self} read {cam_key}: {dt_ms:.1f}ms")
+            dt_s = time.perf_counter() - start
+            logger.debug(f"{self} read {cam_key}: {dt_s * 1e3:.1f}ms")
+            if self.profiler is not None:
+                self.profiler.record(f"camera_read/{cam_key}", dt_s)
 
         return obs_dict
 
@@ -581,13 +630,8 @@ class XLerobot(Robot):
         
         
         if self.config.max_relative_target is not None:
-            # Read present positions for left arm, right arm, and head
-            present_pos_left = self.bus1.sync_read("Present_Position", self.left_arm_motors)
-            present_pos_right = self.bus2.sync_read("Present_Position", self.right_arm_motors)
-            present_pos_head = self.bus1.sync_read("Present_Position", self.head_motors)
-
-            # Combine all present positions
-            present_pos = {**present_pos_left, **present_pos_right, **present_pos_head}
+            # Present positions for left arm, right arm, and head (cached from the last observation if fresh)
+            present_pos = self._read_present_pos()
 
             # Ensure safe goal position for each arm and head
             goal_present_pos = {
@@ -604,15 +648,30 @@ class XLerobot(Robot):
         right_arm_pos_raw = {k.replace(".pos", ""): v for k, v in right_arm_pos.items()}
         head_pos_raw = {k.replace(".pos", ""): v for k, v in head_pos.items()}
         
-        # Only sync_write if there are motors to write to
-        if left_arm_pos_raw:
-            self.bus1.sync_write("Goal_Position", left_arm_pos_raw)
-        if right_arm_pos_raw:
-            self.bus2.sync_write("Goal_Position", right_arm_pos_raw)
-        if head_pos_raw:
-            self.bus1.sync_write("Goal_Position", head_pos_raw)
-        if base_wheel_goal_vel:
-            self.bus2.sync_write("Goal_Velocity", base_wheel_goal_vel)
+        # Only write the goals that moved beyond their deadband, unless all goals are due for a refresh
+        refresh = self._goal_refresh_due()
+        position_deadband = None if refresh else self.config.goal_position_deadband
+        velocity_deadband = None if refresh else self.config.goal_velocity_deadband
+        bus1_goal_pos = self._goals_to_write({**left_arm_pos_raw, **head_pos_raw}, position_deadband)
+        bus2_goal_pos = self._goals_to_write(right_arm_pos_raw, position_deadband)
+        bus2_goal_vel = self._goals_to_write(base_wheel_goal_vel, velocity_deadband)
+
+        # Only sync_write if there are motors to write to. Writes run on the bus threads, both buses in parallel,
+        # so they never interleave with a watchdog stop issued from another thread.
+        def write_bus1():
+            if bus1_goal_pos:
+                self.bus1.sync_write("Goal_Position", bus1_goal_pos)
+                self._written_goals.update(bus1_goal_pos)
+
+        def write_bus2():
+            if bus2_goal_pos:
+                self.bus2.sync_write("Goal_Position", bus2_goal_pos)
+                self._written_goals.update(bus2_goal_pos)
+            if bus2_goal_vel:
+                self.bus2.sync_write("Goal_Velocity", bus2_goal_vel)
+                self._written_goals.update(bus2_goal_vel)
+
+        self.bus_io.run({"bus1": write_bus1, "bus2": write_bus2})
         return {
             **left_arm_pos,
             **right_arm_pos,
@@ -620,14 +679,100 @@ class XLerobot(Robot):
             **base_goal_vel,
         }
 
+    def goal_refresh_pending(self) -> bool:
+        """
+        Returns True if the next `send_action` rewrites all goals, either because `goal_refresh_interval_s`
+        elapsed or because a stop overwrote them.
+        """
+        if self._refresh_requested:
+            return True
+        interval = self.config.goal_refresh_interval_s
+        return interval is not None and time.perf_counter() - self._goals_refreshed_at >= interval
+
+    def _goal_refresh_due(self) -> bool:
+        if not self.goal_refresh_pending():
+            return False
+        self._refresh_requested = False
+        self._goals_refreshed_at = time.perf_counter()
+        return True
+
+    def _goals_to_write(
+        self, goals: dict[str, float], deadband: float | dict[str, float] | None
+    ) -> dict[str, float]:
+        """Returns the goals that differ from the last written ones by more than `deadband` (all if None)."""
+        if deadband is None:
+            return goals
+        written = self._written_goals
+        if isinstance(deadband, dict):
+            return {
+                motor: goal
+                for motor, goal in goals.items()
+                if motor not in written or abs(goal - written[motor]) > deadband.get(motor, 0.0)
+            }
+        return {
+            motor: goal for motor, goal in goals.items() if motor not in written or abs(goal - written[motor]) > deadband
+        }
+
+    def _forget_goals(self, motors: list[str]) -> None:
+        # Goals written outside of send_action, the next send_action must write these motors again
+        for motor in motors:
+            self._written_goals.pop(motor, None)
+        # Held commands only arrive as keep-alives, ask the host for the full command on the next tick
+        self._refresh_requested = True
+
     def stop_base(self):
-        self.bus2.sync_write("Goal_Velocity", dict.fromkeys(self.base_motors, 0), num_retry=5)
+        self.bus_io.run({"bus2": self._stop_base_motors})
         logger.info("Base motors stopped")
 
+    def _stop_base_motors(self) -> None:
+        self._forget_goals(self.base_motors)
+        self.bus2.sync_write("Goal_Velocity", dict.fromkeys(self.base_motors, 0), num_retry=5)
+
+    def _hold_bus1(self) -> None:
+        # Freeze the goals of the left arm and head where they are, torque stays enabled
+        self._forget_goals(self.left_arm_motors + self.head_motors)
+        pos = self.bus1.sync_read("Present_Position", self.left_arm_motors + self.head_motors)
+        self.bus1.sync_write("Goal_Position", pos)
+
+    def _hold_bus2(self) -> None:
+        # Stop the base first, it is the part that can run into things
+        self._stop_base_motors()
+        self._forget_goals(self.right_arm_motors)
+        pos = self.bus2.sync_read("Present_Position", self.right_arm_motors)
+        self.bus2.sync_write("Goal_Position", pos)
+
+    def stop_all(self, wait: bool = True) -> None:
+        """
+        Holds both arms and the head at their present position and stops the base.
+
+        Parameters:
+          wait: If False and the bus threads are running, the stop transactions are queued on the bus threads
+            and this returns immediately. They run as soon as the current transaction of each bus completes,
+            independently of what the calling thread does next.
+        """
+        transactions = {"bus1": self._hold_bus1, "bus2": self._hold_bus2}
+        if wait or not self.bus_io.is_running:
+            self.bus_io.run(transactions)
+            logger.info("All motors stopped")
+            return
+
+        for bus_name, fn in transactions.items():
+            future = self.bus_io.submit(bus_name, fn)
+            future.add_done_callback(partial(self._log_stop_result, bus_name))
+
+    @staticmethod
+    def _log_stop_result(bus_name: str, future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Failed to stop motors on {bus_name}: {error}")
+        else:
+            logger.info(f"Motors on {bus_name} stopped")
+
     def disconnect(self):
         if not self.is_connected:
             raise DeviceNotConnectedError(f"{self} is not connected.")
 
+        self.bus_io.stop()
         self.stop_base()
         self.bus1.disconnect(self.config.disable_torque_on_disconnect)
         self.bus2.disconnect(self.config.disable_torque_on_disconnect)
@@ -14,13 +14,12 @@
 
 # TODO(aliberts, Steven, Pepijn): use gRPC calls instead of zmq?
 
-import base64
 import json
 import logging
+import time
 from functools import cached_property
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import cv2
 import numpy as np
 import zmq
 
@@ -28,6 +27,19 @@ from lerobot.utils.errors import DeviceAlreadyConnectedError, DeviceNotConnected
 
 from ..robot import Robot
 from .config_xlerobot import XLerobotConfig, XLerobotClientConfig
+from .frame_decoder import LazyFrame, decoded_shape, validate_decode_scale
+from .receiver import LatestMessageReceiver, ReceivedMessage, drain_latest
+from .transport import (
+    TRANSPORT_BINARY,
+    TRANSPORT_STREAMS,
+    action_schema_id,
+    decode_observation_binary,
+    decode_stream_message,
+    encode_action_delta,
+    encode_action_schema,
+    validate_action_transport,
+    validate_transport,
+)
 
 
 class XLerobotClient(Robot):
@@ -49,6 +61,20 @@ class XLerobotClient(Robot):
         self.polling_timeout_ms = config.polling_timeout_ms
         self.connect_timeout_s = config.connect_timeout_s
 
+        validate_transport(config.observation_transport)
+        self.observation_transport = config.observation_transport
+
+        validate_action_transport(config.action_transport)
+        self.action_transport = config.action_transport
+        self.action_keyframe_interval = config.action_keyframe_interval
+        self._last_sent_action: Optional[np.ndarray] = None
+        self._last_sent_present: Optional[np.ndarray] = None
+        self._ticks_since_keyframe = 0
+
+        validate_decode_scale(config.frame_decode_scale)
+        self.frame_decode_scale = config.frame_decode_scale
+        self.lazy_frames = config.lazy_frames
+
         self.zmq_context = None
         self.zmq_cmd_socket = None
         self.zmq_observation_socket = None
@@ -56,6 +82,10 @@ class XLerobotClient(Robot):
         self.last_frames = {}
 
         self.last_remote_state = {}
+        self._last_receive_time: Optional[float] = None
+
+        self.receive_in_background = config.receive_in_background
+        self._receiver: Optional[LatestMessageReceiver] = None
 
         # Define three speed levels and a current index
         self.speed_levels = [
@@ -97,9 +127,16 @@ class XLerobotClient(Robot):
     def _state_order(self) -> tuple[str, ...]:
         return tuple(self._state_ft.keys())
 
+    @cached_property
+    def _action_schema_id(self) -> int:
+        return action_schema_id(self._state_order)
+
     @cached_property
     def _cameras_ft(self) -> dict[str, tuple[int, int, int]]:
-        return {name: (cfg.height, cfg.width, 3) for name, cfg in self.config.cameras.items()}
+        return {
+            name: decoded_shape(cfg.height, cfg.width, self.config.frame_decode_scale)
+            for name, cfg in self.config.cameras.items()
+        }
 
     @cached_property
     def observation_features(self) -> dict[str, type | tuple]:
@@ -129,12 +166,29 @@ class XLerobotClient(Robot):
         self.zmq_cmd_socket = self.zmq_context.socket(zmq.PUSH)
         zmq_cmd_locator = f"tcp://{self.remote_ip}:{self.port_zmq_cmd}"
         self.zmq_cmd_socket.connect(zmq_cmd_locator)
-        self.zmq_cmd_socket.setsockopt(zmq.CONFLATE, 1)
+        if self.action_transport == TRANSPORT_BINARY:
+            # Deltas only carry the changed keys, so none of them may be conflated away. The queue is kept short
+            # and full sends are dropped instead of blocking, the next tick then sends a keyframe.
+            self.zmq_cmd_socket.setsockopt(zmq.SNDHWM, 4)
+            self._last_sent_action = None
+            self._last_sent_present = None
+        else:
+            self.zmq_cmd_socket.setsockopt(zmq.CONFLATE, 1)
 
-        self.zmq_observation_socket = self.zmq_context.socket(zmq.PULL)
         zmq_observations_locator = f"tcp://{self.remote_ip}:{self.port_zmq_observations}"
+        if self.observation_transport == TRANSPORT_STREAMS:
+            # State and cameras arrive as separate topics, the latest sample of each one is kept
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.SUB)
+            self.zmq_observation_socket.setsockopt(zmq.RCVHWM, 8)
+            self.zmq_observation_socket.setsockopt(zmq.SUBSCRIBE, b"")
+        elif self.observation_transport == TRANSPORT_BINARY:
+            # CONFLATE does not support multipart messages, the queue is drained to the newest one instead
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.PULL)
+            self.zmq_observation_socket.setsockopt(zmq.RCVHWM, 1)
+        else:
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.PULL)
+            self.zmq_observation_socket.setsockopt(zmq.CONFLATE, 1)
         self.zmq_observation_socket.connect(zmq_observations_locator)
-        self.zmq_observation_socket.setsockopt(zmq.CONFLATE, 1)
 
         poller = zmq.Poller()
         poller.register(self.zmq_observation_socket, zmq.POLLIN)
@@ -142,40 +196,49 @@ class XLerobotClient(Robot):
         if self.zmq_observation_socket not in socks or socks[self.zmq_observation_socket] != zmq.POLLIN:
             raise DeviceNotConnectedError("Timeout waiting for LeKiwi Host to connect expired.")
 
+        if self.receive_in_background:
+            self._receiver = LatestMessageReceiver(
+                self.zmq_observation_socket, self._message_key, self.polling_timeout_ms
+            )
+            self._receiver.start()
+
         self._is_connected = True
 
     def calibrate(self) -> None:
         pass
 
-    def _poll_and_get_latest_message(self) -> Optional[str]:
-        """Polls the ZMQ socket for a limited time and returns the latest message string."""
-        poller = zmq.Poller()
-        poller.register(self.zmq_observation_socket, zmq.POLLIN)
+    def _message_key(self, parts: List[zmq.Frame]) -> Optional[bytes]:
+        """Channel of a received message: its topic for the "streams" transport, a single channel otherwise."""
+        if self.observation_transport == TRANSPORT_STREAMS:
+            return parts[0].bytes
+        return None
 
-        try:
-            socks = dict(poller.poll(self.polling_timeout_ms))
-        except zmq.ZMQError as e:
-            logging.error(f"ZMQ polling error: {e}")
-            return None
+    def _receive_latest_messages(self) -> Dict[Optional[bytes], ReceivedMessage]:
+        """Returns the newest undecoded message per channel received since the previous call.
 
-        if self.zmq_observation_socket not in socks:
-            logging.info("No new data available within timeout.")
-            return None
+        With a background receiver this never blocks. Otherwise the socket is polled for up to
+        `polling_timeout_ms` ("json" and "binary") and drained, older messages are dropped without being copied.
+        """
+        if self._receiver is not None:
+            return self._receiver.take()
+
+        if self.observation_transport != TRANSPORT_STREAMS:
+            poller = zmq.Poller()
+            poller.register(self.zmq_observation_socket, zmq.POLLIN)
 
-        last_msg = None
-        while True:
             try:
-                msg = self.zmq_observation_socket.recv_string(zmq.NOBLOCK)
-                last_msg = msg
-            except zmq.Again:
-                break
+                socks = dict(poller.poll(self.polling_timeout_ms))
+            except zmq.ZMQError as e:
+                logging.error(f"ZMQ polling error: {e}")
+                return {}
 
-        if last_msg is None:
-            logging.warning("Poller indicated data, but failed to retrieve message.")
+            if self.zmq_observation_socket not in socks:
+                logging.info("No new data available within timeout.")
+                return {}
 
-        return last_msg
+        return drain_latest(self.zmq_observation_socket, self._message_key)
 
-    def _parse_observation_json(self, obs_string: str) -> Optional[Dict[str, Any]]:
+    def _parse_observation_json(self, obs_string: Union[str, bytes]) -> Optional[Dict[str, Any]]:
         """Parses the JSON observation string."""
         try:
             return json.loads(obs_string)
@@ -183,24 +246,46 @@ class XLerobotClient(Robot):
             logging.error(f"Error decoding JSON observation: {e}")
             return None
 
-    def _decode_image_from_b64(self, image_b64: str) -> Optional[np.ndarray]:
-        """Decodes a base64 encoded image string to an OpenCV image."""
-        if not image_b64:
-            return None
-        try:
-            jpg_data = base64.b64decode(image_b64)
-            np_arr = np.frombuffer(jpg_data, dtype=np.uint8)
-            frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            if frame is None:
-                logging.warning("cv2.imdecode returned None for an image.")
-            return frame
-        except (TypeError, ValueError) as e:
-            logging.error(f"Error decoding base64 image data: {e}")
+    def _lazy_frame(self, cam_name: str, data: Any, base64_encoded: bool = False) -> Optional[LazyFrame]:
+        """Wraps an encoded camera frame in a handle decoded on first access, None if the frame is empty."""
+        if data is None or len(data) == 0:
             return None
+        return LazyFrame(
+            data,
+            scale=self.frame_decode_scale,
+            base64_encoded=base64_encoded,
+            fallback_shape=self._cameras_ft[cam_name],
+        )
+
+    def _remote_state_from_vector(self, state: np.ndarray) -> Dict[str, Any]:
+        """Builds the state part of an observation from a float32 vector in `_state_order`."""
+        if state.size != len(self._state_order):
+            raise ValueError(f"Expected {len(self._state_order)} state values from host, got {state.size}")
+
+        state_vec = state.astype(np.float32)
+        flat_state = {key: float(state_vec[i]) for i, key in enumerate(self._state_order)}
+        return {**flat_state, "observation.state": state_vec}
+
+    def _remote_state_from_binary(
+        self, parts: List[zmq.Frame]
+    ) -> Tuple[Dict[str, LazyFrame], Dict[str, Any]]:
+        """Extracts frames, and state from a binary multipart observation."""
+        state, jpeg_frames = decode_observation_binary(parts)
+        obs_dict = self._remote_state_from_vector(state)
+
+        current_frames: Dict[str, LazyFrame] = {}
+        for cam_name, jpg_data in jpeg_frames.items():
+            if cam_name not in self._cameras_ft:
+                continue
+            frame = self._lazy_frame(cam_name, jpg_data)
+            if frame is not None:
+                current_frames[cam_name] = frame
+
+        return current_frames, obs_dict
 
     def _remote_state_from_obs(
         self, observation: Dict[str, Any]
-    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    ) -> Tuple[Dict[str, LazyFrame], Dict[str, Any]]:
         """Extracts frames, and state from the parsed observation."""
 
         flat_state = {key: observation.get(key, 0.0) for key in self._state_order}
@@ -209,51 +294,77 @@ class XLerobotClient(Robot):
 
         obs_dict: Dict[str, Any] = {**flat_state, "observation.state": state_vec}
 
-        # Decode images
-        current_frames: Dict[str, np.ndarray] = {}
+        # Images are only decoded when accessed
+        current_frames: Dict[str, LazyFrame] = {}
         for cam_name, image_b64 in observation.items():
             if cam_name not in self._cameras_ft:
                 continue
-            frame = self._decode_image_from_b64(image_b64)
+            frame = self._lazy_frame(cam_name, image_b64, base64_encoded=True)
             if frame is not None:
                 current_frames[cam_name] = frame
 
         return current_frames, obs_dict
 
-    def _get_data(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any], Dict[str, Any]]:
+    def _process_stream_messages(self, messages: Dict[Optional[bytes], ReceivedMessage]) -> None:
         """
-        Polls the video socket for the latest observation data.
+        Decodes the latest sample of every "streams" topic into the cached observation.
 
-        Attempts to retrieve and decode the latest message within a short timeout.
-        If successful, updates and returns the new frames, speed, and arm state.
-        If no new data arrives or decoding fails, returns the last known values.
+        State and camera topics are published at independent rates, so each one only replaces its own part
+        of the cached observation.
         """
-
-        # 1. Get the latest message string from the socket
-        latest_message_str = self._poll_and_get_latest_message()
-
-        # 2. If no message, return cached data
-        if latest_message_str is None:
-            return self.last_frames, self.last_remote_state
-
-        # 3. Parse the JSON message
-        observation = self._parse_observation_json(latest_message_str)
-
-        # 4. If JSON parsing failed, return cached data
-        if observation is None:
-            return self.last_frames, self.last_remote_state
-
-        # 5. Process the valid observation data
+        for parts, received_at in messages.values():
+            try:
+                cam_name, _timestamp, payload = decode_stream_message(parts)
+                if cam_name is None:
+                    self.last_remote_state = self._remote_state_from_vector(payload)
+                    self._last_receive_time = received_at
+                elif cam_name in self._cameras_ft:
+                    frame = self._lazy_frame(cam_name, payload)
+                    if frame is not None:
+                        self.last_frames = {**self.last_frames, cam_name: frame}
+            except Exception as e:
+                logging.error(f"Error processing stream data, serving last sample: {e}")
+
+    def _process_message(self, parts: List[zmq.Frame], received_at: float) -> None:
+        """Decodes a "json" or "binary" observation into the cached observation, keeping it on failure."""
         try:
-            new_frames, new_state = self._remote_state_from_obs(observation)
+            if self.observation_transport == TRANSPORT_BINARY:
+                new_frames, new_state = self._remote_state_from_binary(parts)
+            else:
+                observation = self._parse_observation_json(parts[0].bytes)
+                if observation is None:
+                    return
+                new_frames, new_state = self._remote_state_from_obs(observation)
         except Exception as e:
             logging.error(f"Error processing observation data, serving last observation: {e}")
-            return self.last_frames, self.last_remote_state
+            return
 
         self.last_frames = new_frames
         self.last_remote_state = new_state
+        self._last_receive_time = received_at
 
-        return new_frames, new_state
+    def _get_data(self) -> Tuple[Dict[str, LazyFrame], Dict[str, Any]]:
+        """
+        Returns the latest observation data.
+
+        Only the newest received message (per topic for the "streams" transport) is decoded, and only once.
+        If no new data arrived or decoding fails, returns the last known values.
+        """
+        messages = self._receive_latest_messages()
+
+        if self.observation_transport == TRANSPORT_STREAMS:
+            self._process_stream_messages(messages)
+        elif messages:
+            self._process_message(*messages[None])
+
+        return self.last_frames, self.last_remote_state
+
+    @property
+    def observation_age_s(self) -> Optional[float]:
+        """Seconds since the state served by `get_observation()` was received, `None` before the first one."""
+        if self._last_receive_time is None:
+            return None
+        return time.perf_counter() - self._last_receive_time
 
     def get_observation(self) -> dict[str, Any]:
         """
@@ -266,11 +377,15 @@ class XLerobotClient(Robot):
 
         frames, obs_dict = self._get_data()
 
-        # Loop over each configured camera
-        for cam_name, frame in frames.items():
+        # Loop over each configured camera, frames received once are only decoded once
+        for cam_name, lazy_frame in frames.items():
+            if self.lazy_frames:
+                obs_dict[cam_name] = lazy_frame
+                continue
+            frame = lazy_frame.decode()
             if frame is None:
                 logging.warning("Frame is None")
-                frame = np.zeros((640, 480, 3), dtype=np.uint8)
+                frame = np.zeros(lazy_frame.fallback_shape, dtype=np.uint8)
             obs_dict[cam_name] = frame
 
         return obs_dict
@@ -330,15 +445,41 @@ class XLerobotClient(Robot):
                 "ManipulatorRobot is not connected. You need to run `robot.connect()`."
             )
 
-        self.zmq_cmd_socket.send_string(json.dumps(action))  # action is in motor space
-
         # TODO(Steven): Remove the np conversion when it is possible to record a non-numpy array value
         actions = np.array([action.get(k, 0.0) for k in self._state_order], dtype=np.float32)
 
+        if self.action_transport == TRANSPORT_BINARY:
+            self._send_action_delta(action, actions)
+        else:
+            self.zmq_cmd_socket.send_string(json.dumps(action))  # action is in motor space
+
         action_sent = {key: actions[i] for i, key in enumerate(self._state_order)}
         action_sent["action"] = actions
         return action_sent
 
+    def _send_action_delta(self, action: dict[str, Any], actions: np.ndarray) -> None:
+        """Sends the keys of `action` that changed since the previous tick, or all of them on a keyframe."""
+        # Missing velocities mean "stop", like with the json transport. Missing positions are not commanded.
+        present = np.array([key in action or key.endswith(".vel") for key in self._state_order])
+
+        keyframe = self._last_sent_action is None or self._ticks_since_keyframe >= self.action_keyframe_interval
+        try:
+            if keyframe:
+                self.zmq_cmd_socket.send(encode_action_schema(self._state_order), zmq.NOBLOCK)
+                mask = present
+                self._ticks_since_keyframe = 0
+            else:
+                # Keys that were missing last tick are stored as 0.0, send them even if they are now commanded to 0.0
+                mask = present & ((actions != self._last_sent_action) | ~self._last_sent_present)
+            self.zmq_cmd_socket.send(encode_action_delta(self._action_schema_id, actions, mask), zmq.NOBLOCK)
+        except zmq.Again:
+            logging.warning("Command queue to the host is full, dropping the action")
+            self._last_sent_action = None
+            return
+        self._ticks_since_keyframe += 1
+        self._last_sent_action = actions
+        self._last_sent_present = present
+
     def disconnect(self):
         """Cleans ZMQ comms"""
 
@@ -346,6 +487,9 @@ class XLerobotClient(Robot):
             raise DeviceNotConnectedError(
                 "LeKiwi is not connected. You need to run `robot.connect()` before disconnecting."
             )
+        if self._receiver is not None:
+            self._receiver.stop()
+            self._receiver = None
         self.zmq_observation_socket.close()
         self.zmq_cmd_socket.close()
         self.zmq_context.term()
@@ -18,30 +18,166 @@ import base64
 import json
 import logging
 import time
+from typing import Any
 
-import cv2
 import zmq
 
 from .xlerobot import XLerobot
-from .config_xlerobot import XLerobotConfig, XLerobotHostConfig
+from .config_xlerobot import CameraEncodingConfig, XLerobotConfig, XLerobotHostConfig
+from .frame_encoder import AsyncFrameEncoder, encode_jpeg
+from .loop_scheduler import RateScheduler
+from .profiling import LoopProfiler, StatsServer
+from .shm_bus import ObservationBusWriter
+from .transport import (
+    TRANSPORT_BINARY,
+    TRANSPORT_STREAMS,
+    ActionDeltaDecoder,
+    encode_camera_message,
+    encode_observation_binary,
+    encode_state_message,
+    validate_action_transport,
+    validate_transport,
+)
+from .watchdog import Watchdog
 
 
 class XLerobotHost:
     def __init__(self, config: XLerobotHostConfig):
+        validate_transport(config.observation_transport)
+        self.observation_transport = config.observation_transport
+
+        validate_action_transport(config.action_transport)
+        self.action_transport = config.action_transport
+        self._action_decoder = ActionDeltaDecoder()
+
         self.zmq_context = zmq.Context()
         self.zmq_cmd_socket = self.zmq_context.socket(zmq.PULL)
-        self.zmq_cmd_socket.setsockopt(zmq.CONFLATE, 1)
+        if self.action_transport != TRANSPORT_BINARY:
+            # Binary deltas only carry the changed keys, they are all drained and applied in order instead
+            self.zmq_cmd_socket.setsockopt(zmq.CONFLATE, 1)
         self.zmq_cmd_socket.bind(f"tcp://*:{config.port_zmq_cmd}")
 
-        self.zmq_observation_socket = self.zmq_context.socket(zmq.PUSH)
-        self.zmq_observation_socket.setsockopt(zmq.CONFLATE, 1)
+        if self.observation_transport == TRANSPORT_STREAMS:
+            # One topic per channel, subscribers keep the latest sample of each topic. The small high-water
+            # mark bounds how stale queued samples can get when a subscriber falls behind.
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.PUB)
+            self.zmq_observation_socket.setsockopt(zmq.SNDHWM, 8)
+        elif self.observation_transport == TRANSPORT_BINARY:
+            # CONFLATE does not support multipart messages, keep at most one queued observation instead
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.PUSH)
+            self.zmq_observation_socket.setsockopt(zmq.SNDHWM, 1)
+        else:
+            self.zmq_observation_socket = self.zmq_context.socket(zmq.PUSH)
+            self.zmq_observation_socket.setsockopt(zmq.CONFLATE, 1)
         self.zmq_observation_socket.bind(f"tcp://*:{config.port_zmq_observations}")
 
         self.connection_time_s = config.connection_time_s
         self.watchdog_timeout_ms = config.watchdog_timeout_ms
+        self.loop_stall_timeout_ms = config.loop_stall_timeout_ms
         self.max_loop_freq_hz = config.max_loop_freq_hz
+        self.scheduler = RateScheduler(
+            config.max_loop_freq_hz,
+            overrun_policy=config.loop_overrun_policy,
+            busy_wait_s=config.loop_busy_wait_ms / 1000,
+        )
+
+        self.async_encoding = config.async_encoding
+        self.encoder_workers = config.encoder_workers
+        self.camera_encoding = config.camera_encoding
+
+        self.shm_name = config.shm_name
+        self.shm_slots = config.shm_slots
+
+        self.state_publish_hz = config.state_publish_hz
+        self.camera_publish_hz = config.camera_publish_hz
+        self._last_publish_time: dict[str, float] = {}
+        self._last_sent_frames: dict[str, Any] = {}
+
+        self.profiler = LoopProfiler(config.max_loop_freq_hz, config.profile_window)
+        self.stats_server = None
+        if config.port_zmq_stats is not None:
+            self.stats_server = StatsServer(self.zmq_context, config.port_zmq_stats, self.profiler)
+
+    def receive_action(self, full: bool = False) -> dict[str, Any] | None:
+        """
+        Receives the pending command without blocking.
+
+        Args:
+          full: with the "binary" transport, return every commanded goal even if nothing changed, e.g. when
+            the robot is due to rewrite all of its goals.
+
+        Returns:
+          The action to send to the robot, or None if the command did not change any goal (a "binary"
+          keep-alive) and `full` is False. With the "binary" transport, the action only holds the changed
+          positions, so groups whose goals did not change are not written, and all base velocities.
+
+        Raises:
+            zmq.Again: if no command is pending.
+        """
+        if self.action_transport != TRANSPORT_BINARY:
+            return dict(json.loads(self.zmq_cmd_socket.recv_string(zmq.NOBLOCK)))
+
+        received = False
+        changed = set()
+        while True:
+            try:
+                message = self.zmq_cmd_socket.recv(zmq.NOBLOCK, copy=False)
+            except zmq.Again:
+                break
+            received = True
+            try:
+                indices = self._action_decoder.apply(message)
+            except ValueError as e:
+                logging.error("Dropping malformed action message: %s", e)
+                continue
+            if indices is not None:
+                changed.update(indices.tolist())
+        if not received:
+            raise zmq.Again()
+        keys = self._action_decoder.keys
+        values = self._action_decoder.values
+        if full and values is not None:
+            commanded = self._action_decoder.commanded
+            return {
+                key: float(values[i]) for i, key in enumerate(keys) if key.endswith(".vel") or commanded[i]
+            }
+        if not changed:
+            return None
+
+        return {
+            key: float(values[i])
+            for i, key in enumerate(keys)
+            if key.endswith(".vel") or (i in changed and key.endswith(".pos"))
+        }
+
+    def is_due(self, channel: str, rate_hz: float | None, now: float) -> bool:
+        """Returns True, and records the publish time, if `channel` may be published again at `rate_hz`."""
+        if not rate_hz:
+            return True
+        last = self._last_publish_time.get(channel)
+        if last is not None and now - last < 1 / rate_hz:
+            return False
+        self._last_publish_time[channel] = now
+        return True
+
+    def publish_streams(
+        self, state_order: tuple[str, ...], observation: dict[str, Any] | None, jpeg_frames: dict[str, Any]
+    ) -> None:
+        """Publishes the state (if given) and every camera buffer that was not published yet on its own topic."""
+        timestamp = time.time()
+        if observation is not None:
+            parts = encode_state_message(state_order, observation, timestamp)
+            self.zmq_observation_socket.send_multipart(parts, flags=zmq.NOBLOCK, copy=False)
+        for cam_key, buffer in jpeg_frames.items():
+            if len(buffer) == 0 or self._last_sent_frames.get(cam_key) is buffer:
+                continue
+            parts = encode_camera_message(cam_key, buffer, timestamp)
+            self.zmq_observation_socket.send_multipart(parts, flags=zmq.NOBLOCK, copy=False)
+            self._last_sent_frames[cam_key] = buffer
 
     def disconnect(self):
+        if self.stats_server is not None:
+            self.stats_server.close()
         self.zmq_observation_socket.close()
         self.zmq_cmd_socket.close()
         self.zmq_context.term()
@@ -58,58 +194,113 @@ def main():
     logging.info("Starting HostAgent")
     host_config = XLerobotHostConfig()
     host = XLerobotHost(host_config)
+    state_order = tuple(robot.action_features)
+    profiler = host.profiler
+    robot.profiler = profiler
+    encoder = None
+    if host.async_encoding and robot.cameras:
+        encoder = AsyncFrameEncoder(
+            list(robot.cameras), host.camera_encoding, max_workers=host.encoder_workers, profiler=profiler
+        )
+
+    def stop_robot(reason: str) -> None:
+        # Runs on the watchdog thread, the stop is queued on the bus threads without waiting for the loop
+        logging.warning(f"{reason}. Stopping all motors.")
+        robot.stop_all(wait=False)
 
-    last_cmd_time = time.time()
-    watchdog_active = False
-    logging.info("Waiting for commands...")
+    watchdog = Watchdog(
+        stop_robot,
+        command_timeout_s=host.watchdog_timeout_ms / 1000,
+        loop_timeout_s=host.loop_stall_timeout_ms / 1000 if host.loop_stall_timeout_ms is not None else None,
+    )
+    watchdog.start()
+    shm_writer = None
     try:
+        # Local consumers read raw frames from shared memory, the block is sized from a first observation
+        if host.shm_name is not None:
+            first_observation = robot.get_observation()
+            camera_shapes = {cam_key: first_observation[cam_key].shape for cam_key in robot.cameras}
+            shm_writer = ObservationBusWriter(host.shm_name, state_order, camera_shapes, host.shm_slots)
+
+        logging.info("Waiting for commands...")
         # Business logic
         start = time.perf_counter()
         duration = 0
         while duration < host.connection_time_s:
-            loop_start_time = time.time()
+            profiler.start_loop()
+            watchdog.feed_loop()
             try:
-                msg = host.zmq_cmd_socket.recv_string(zmq.NOBLOCK)
-                data = dict(json.loads(msg))
-                _action_sent = robot.send_action(data)
-                last_cmd_time = time.time()
-                watchdog_active = False
+                with profiler.measure("command_receive"):
+                    # Held commands arrive as keep-alives, they still carry all goals when a refresh is due
+                    data = host.receive_action(full=robot.goal_refresh_pending())
+                if data is not None:
+                    with profiler.measure("send_action"):
+                        _action_sent = robot.send_action(data)
+                watchdog.feed_command()
             except zmq.Again:
-                if not watchdog_active:
+                if not watchdog.triggered:
                     logging.warning("No command available")
             except Exception as e:
                 logging.error("Message fetching failed: %s", e)
 
-            now = time.time()
-            if (now - last_cmd_time > host.watchdog_timeout_ms / 1000) and not watchdog_active:
-                logging.warning(
-                    f"Command not received for more than {host.watchdog_timeout_ms} milliseconds. Stopping the base."
-                )
-                watchdog_active = True
-                robot.stop_base()
-
-            last_observation = robot.get_observation()
-
-            # Encode ndarrays to base64 strings
-            for cam_key, _ in robot.cameras.items():
-                ret, buffer = cv2.imencode(
-                    ".jpg", last_observation[cam_key], [int(cv2.IMWRITE_JPEG_QUALITY), 90]
-                )
-                if ret:
-                    last_observation[cam_key] = base64.b64encode(buffer).decode("utf-8")
+            with profiler.measure("get_observation"):
+                last_observation = robot.get_observation()
+
+            # Local consumers read raw frames from shared memory, before they are encoded for the network
+            if shm_writer is not None:
+                with profiler.measure("shm_publish"):
+                    shm_writer.publish(last_observation)
+
+            # With the "streams" transport, state and each camera are only published at their own rate
+            publish_time = time.perf_counter()
+            if host.observation_transport == TRANSPORT_STREAMS:
+                state_due = host.is_due("state", host.state_publish_hz, publish_time)
+                due_cameras = [
+                    cam_key
+                    for cam_key in robot.cameras
+                    if host.is_due(f"camera/{cam_key}", host.camera_publish_hz.get(cam_key), publish_time)
+                ]
+            else:
+                due_cameras = list(robot.cameras)
+
+            # Encode ndarrays to JPEG buffers
+            with profiler.measure("encode"):
+                if encoder is not None:
+                    # Hand frames to the encoder pool and send the newest finished buffers
+                    for cam_key in due_cameras:
+                        encoder.submit(cam_key, last_observation[cam_key])
+                    jpeg_frames = encoder.latest()
                 else:
-                    last_observation[cam_key] = ""
+                    jpeg_frames = {
+                        cam_key: encode_jpeg(
+                            last_observation[cam_key], host.camera_encoding.get(cam_key, CameraEncodingConfig())
+                        )
+                        for cam_key in due_cameras
+                    }
 
             # Send the observation to the remote agent
+            publish_start = time.perf_counter()
             try:
-                host.zmq_observation_socket.send_string(json.dumps(last_observation), flags=zmq.NOBLOCK)
+                if host.observation_transport == TRANSPORT_STREAMS:
+                    host.publish_streams(state_order, last_observation if state_due else None, jpeg_frames)
+                elif host.observation_transport == TRANSPORT_BINARY:
+                    parts = encode_observation_binary(state_order, last_observation, jpeg_frames)
+                    host.zmq_observation_socket.send_multipart(parts, flags=zmq.NOBLOCK, copy=False)
+                else:
+                    for cam_key, buffer in jpeg_frames.items():
+                        last_observation[cam_key] = base64.b64encode(buffer).decode("utf-8")
+                    host.zmq_observation_socket.send_string(json.dumps(last_observation), flags=zmq.NOBLOCK)
             except zmq.Again:
                 logging.info("Dropping observation, no client connected")
+            profiler.record("publish", time.perf_counter() - publish_start)
+
+            if host.stats_server is not None:
+                host.stats_server.poll()
 
-            # Ensure a short sleep to avoid overloading the CPU.
-            elapsed = time.time() - loop_start_time
+            profiler.end_loop()
 
-            time.sleep(max(1 / host.max_loop_freq_hz - elapsed, 0))
+            # Wait for the next deadline of the fixed-rate schedule
+            host.scheduler.wait()
             duration = time.perf_counter() - start
         print("Cycle time reached.")
 
@@ -117,6 +308,13 @@ def main():
         print("Keyboard interrupt received. Exiting...")
     finally:
         print("Shutting down Lekiwi Host.")
+        watchdog.stop()
+        logging.info("Loop statistics: %s", json.dumps(profiler.report()["loop"]))
+        logging.info("Loop schedule: %s", json.dumps(host.scheduler.report()))
+        if encoder is not None:
+            encoder.shutdown()
+        if shm_writer is not None:
+            shm_writer.close()
         robot.disconnect()
         host.disconnect()
 
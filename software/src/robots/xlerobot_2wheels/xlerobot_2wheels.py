@@ -32,6 +32,8 @@ from lerobot.motors.feetech import (
 
 from ..robot import Robot
 from ..utils import ensure_safe_goal_position
+from ..xlerobot.base_kinematics import WheelKinematics
+from ..xlerobot.bus_io import BusIOScheduler
 from .config_xlerobot_2wheels import XLerobot2WheelsConfig
 
 logger = logging.getLogger(__name__)
@@ -124,6 +126,9 @@ class XLerobot2Wheels(Robot):
         self.head_motors = [motor for motor in self.bus1.motors if motor.startswith("head")]
         self.base_motors = [motor for motor in self.bus2.motors if motor.startswith("base")]
         self.cameras = make_cameras_from_configs(config.cameras)
+        # bus1 and bus2 are independent serial ports, so their transactions can run concurrently
+        self.bus_io = BusIOScheduler(["bus1", "bus2"])
+        self.base_kinematics = WheelKinematics.differential(config.wheel_radius, config.wheelbase)
 
     @property
     def _state_ft(self) -> dict[str, type]:
@@ -212,6 +217,7 @@ class XLerobot2Wheels(Robot):
             cam.connect()
 
         self.configure()
+        self.bus_io.start()
         logger.info(f"{self} connected.")
 
     @property
@@ -370,8 +376,6 @@ class XLerobot2Wheels(Robot):
         self,
         x: float,
         theta: float,
-        wheel_radius: float = None,
-        wheelbase: float = None,
         max_raw: int = 3000,
     ) -> dict:
         """
@@ -380,8 +384,6 @@ class XLerobot2Wheels(Robot):
         Parameters:
           x_cmd      : Linear velocity in x (m/s).
           theta_cmd  : Rotational velocity (deg/s).
-          wheel_radius: Radius of each wheel (meters).
-          wheelbase  : Distance between left and right wheels (meters).
           max_raw    : Maximum allowed raw command (ticks) per wheel.
 
         Returns:
@@ -391,49 +393,20 @@ class XLerobot2Wheels(Robot):
         Notes:
           - Differential drive kinematics: only x and theta are controllable
           - y velocity is ignored (differential drive cannot move sideways)
+          - The kinematic matrices are precomputed in `self.base_kinematics` from `config.wheel_radius`
+            and `config.wheelbase`.
         """
-        if wheel_radius is None:
-            wheel_radius = self.config.wheel_radius
-        if wheelbase is None:
-            wheelbase = self.config.wheelbase
-            
-        # Convert rotational velocity from deg/s to rad/s.
-        theta_rad = theta * (np.pi / 180.0)
-        
-        # Differential drive kinematics
-        # Left wheel speed = (v - ω*L/2) / r
-        # Right wheel speed = (v + ω*L/2) / r
-        left_wheel_speed = (x - theta_rad * wheelbase / 2) / wheel_radius
-        right_wheel_speed = (x + theta_rad * wheelbase / 2) / wheel_radius
-        
-        # Convert wheel speeds from rad/s to deg/s.
-        left_wheel_degps = left_wheel_speed * (180.0 / np.pi)
-        right_wheel_degps = right_wheel_speed * (180.0 / np.pi)
-
-        # Scaling
-        steps_per_deg = 4096.0 / 360.0
-        raw_floats = [abs(degps) * steps_per_deg for degps in [left_wheel_degps, right_wheel_degps]]
-        max_raw_computed = max(raw_floats)
-        if max_raw_computed > max_raw:
-            scale = max_raw / max_raw_computed
-            left_wheel_degps = left_wheel_degps * scale
-            right_wheel_degps = right_wheel_degps * scale
-
-        # Convert each wheel's angular speed (deg/s) to a raw integer.
-        left_wheel_raw = self._degps_to_raw(left_wheel_degps)
-        right_wheel_raw = self._degps_to_raw(right_wheel_degps)
+        wheel_raw = self.base_kinematics.body_to_wheel_raw(np.array([x, theta]), max_raw=max_raw)
 
         return {
-            "base_left_wheel": left_wheel_raw,
-            "base_right_wheel": right_wheel_raw,
+            "base_left_wheel": int(wheel_raw[0]),
+            "base_right_wheel": int(wheel_raw[1]),
         }
 
     def _wheel_raw_to_body(
         self,
         left_wheel_speed,
         right_wheel_speed,
-        wheel_radius: float = None,
-        wheelbase: float = None,
     ) -> dict[str, Any]:
         """
         Convert wheel raw command feedback back into body-frame velocities for differential drive.
@@ -441,41 +414,16 @@ class XLerobot2Wheels(Robot):
         Parameters:
           left_wheel_speed  : Raw command for left wheel.
           right_wheel_speed : Raw command for right wheel.
-          wheel_radius      : Radius of each wheel (meters).
-          wheelbase         : Distance between left and right wheels (meters).
 
         Returns:
           A dict (x.vel, theta.vel) in m/s and deg/s
         """
-        if wheel_radius is None:
-            wheel_radius = self.config.wheel_radius
-        if wheelbase is None:
-            wheelbase = self.config.wheelbase
-
-        # Convert each raw command back to an angular speed in deg/s.
-        left_degps = self._raw_to_degps(left_wheel_speed)
-        right_degps = self._raw_to_degps(right_wheel_speed)
-
-        # Convert from deg/s to rad/s.
-        left_radps = left_degps * (np.pi / 180.0)
-        right_radps = right_degps * (np.pi / 180.0)
-        
-        # Compute each wheel's linear speed (m/s) from its angular speed.
-        left_linear_speed = left_radps * wheel_radius
-        right_linear_speed = right_radps * wheel_radius
-
-        # Differential drive inverse kinematics
-        # v = (v_left + v_right) / 2
-        # ω = (v_right - v_left) / L
-        x_vel = (left_linear_speed + right_linear_speed) / 2
-        theta_rad = (right_linear_speed - left_linear_speed) / wheelbase
-        theta_vel = theta_rad * (180.0 / np.pi)
-        
+        x_vel, theta_vel = self.base_kinematics.wheel_raw_to_body(np.array([left_wheel_speed, right_wheel_speed]))
         return {
             "x.vel": x_vel,
             "theta.vel": theta_vel,
-        }  # m/s and deg/s
-    
+        }
+
     def _from_keyboard_to_base_action(self, pressed_keys: np.ndarray):
         # Speed control
         if self.teleop_keys["speed_up"] in pressed_keys:
@@ -503,17 +451,33 @@ class XLerobot2Wheels(Robot):
             "theta.vel": theta_cmd,
         }
 
+    def _read_bus1_state(self) -> tuple[dict[str, float], dict[str, float]]:
+        # Left arm and head share the same register, so a single sync_read covers both
+        pos = self.bus1.sync_read("Present_Position", self.left_arm_motors + self.head_motors)
+        left_arm_pos = {k: pos[k] for k in self.left_arm_motors}
+        head_pos = {k: pos[k] for k in self.head_motors}
+        return left_arm_pos, head_pos
+
+    def _read_bus2_state(self) -> tuple[dict[str, float], dict[str, float]]:
+        right_arm_pos = self.bus2.sync_read("Present_Position", self.right_arm_motors)
+        base_wheel_vel = self.bus2.sync_read("Present_Velocity", self.base_motors)
+        return right_arm_pos, base_wheel_vel
+
     def get_observation(self) -> dict[str, Any]:
         if not self.is_connected:
             raise DeviceNotConnectedError(f"{self} is not connected.")
 
-        # Read actuators position for arm and vel for base
+        # Read actuators position for arm and vel for base, both buses in parallel
         start = time.perf_counter()
-        left_arm_pos = self.bus1.sync_read("Present_Position", self.left_arm_motors)
-        right_arm_pos = self.bus2.sync_read("Present_Position", self.right_arm_motors)
-        head_pos = self.bus1.sync_read("Present_Position", self.head_motors)
-        base_wheel_vel = self.bus2.sync_read("Present_Velocity", self.base_motors)
-        
+        bus_reads = self.bus_io.run(
+            {
+                "bus1": self._read_bus1_state,
+                "bus2": self._read_bus2_state,
+            }
+        )
+        left_arm_pos, head_pos = bus_reads["bus1"]
+        right_arm_pos, base_wheel_vel = bus_reads["bus2"]
+
         base_vel = self._wheel_raw_to_body(
             base_wheel_vel["base_left_wheel"],
             base_wheel_vel["base_right_wheel"],
@@ -611,6 +575,7 @@ class XLerobot2Wheels(Robot):
         if not self.is_connected:
             raise DeviceNotConnectedError(f"{self} is not connected.")
 
+        self.bus_io.stop()
         self.stop_base()
         self.bus1.disconnect(self.config.disable_torque_on_disconnect)
         self.bus2.disconnect(self.config.disable_torque_on_disconnect)
@@ -20,8 +20,7 @@ from typing import Any
 import numpy as np
 import zmq
 
-from lerobot.utils.robot_utils import busy_wait
-
+from ..xlerobot.loop_scheduler import RateScheduler
 from .xlerobot_2wheels import XLerobot2Wheels
 from .config_xlerobot_2wheels import XLerobot2WheelsConfig, XLerobot2WheelsHostConfig
 
@@ -75,11 +74,10 @@ class XLerobot2WheelsHost:
         
         logger.info("Starting XLerobot2Wheels host control loop...")
         start_time = time.time()
+        scheduler = RateScheduler(self.host_config.max_loop_freq_hz)
         
         try:
             while self._is_running:
-                loop_start = time.time()
-                
                 # Check for commands with timeout
                 if self.zmq_cmd_socket.poll(timeout=1):  # 1ms timeout
                     try:
@@ -110,11 +108,8 @@ class XLerobot2WheelsHost:
                     logger.info("Connection time limit reached, stopping host")
                     break
                 
-                # Control loop frequency
-                loop_duration = time.time() - loop_start
-                target_dt = 1.0 / self.host_config.max_loop_freq_hz
-                if loop_duration < target_dt:
-                    busy_wait(target_dt - loop_duration)
+                # Control loop frequency, paced against absolute deadlines
+                scheduler.wait()
                 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt, stopping host")
@@ -17,6 +17,7 @@ import {
   Settings
 } from 'lucide-react';
 import { formatLatency, formatFPS, formatTime } from '../../utils/format';
+import { parseVideoPacket } from '../../utils/videoPacket';
 import { ENV } from '../../config/environment';
 
 interface RobotVideoCanvasProps {
@@ -75,30 +76,58 @@ export function RobotVideoCanvas({
   useEffect(() => {
     if (!socket) return;
 
-    const handleVideoFrame = (data: any) => {
-      const canvas = canvasRef.current;
-      if (!canvas) return;
+    // Frees the server's send window for this client once the frame is on screen
+    const ackFrame = (sequence: number) => socket.emit('video_frame_ack', { sequence });
 
-      const ctx = canvas.getContext('2d');
-      if (!ctx) return;
+    const getContext = () => {
+      const canvas = canvasRef.current;
+      const ctx = canvas?.getContext('2d');
+      if (!canvas || !ctx) return null;
 
       const dpr = window.devicePixelRatio || 1;
-      const logicalWidth = canvas.width / dpr;
-      const logicalHeight = canvas.height / dpr;
+      return { ctx, width: canvas.width / dpr, height: canvas.height / dpr };
+    };
+
+    const drawFrame = (image: CanvasImageSource) => {
+      const target = getContext();
+      if (!target) return;
+
+      target.ctx.clearRect(0, 0, target.width, target.height);
+      target.ctx.drawImage(image, 0, 0, target.width, target.height);
+      drawVideoOverlays(target.ctx, target.width, target.height);
+    };
+
+    const handleVideoPacket = (buffer: ArrayBuffer) => {
+      const packet = parseVideoPacket(buffer);
+      if (!packet) return;
+
+      // Decodes the JPEG off the main thread, no base64 round trip
+      const blob = new Blob([packet.jpeg], { type: `image/${ENV.VIDEO_FORMAT}` });
+      createImageBitmap(blob).then((bitmap) => {
+        drawFrame(bitmap);
+        bitmap.close();
+      }).catch(() => {}).finally(() => ackFrame(packet.sequence));
+    };
 
-      if (data.frame) {
-        const img = new Image();
-        img.onload = () => {
-          ctx.clearRect(0, 0, logicalWidth, logicalHeight);
-          ctx.drawImage(img, 0, 0, logicalWidth, logicalHeight);
-          drawVideoOverlays(ctx, logicalWidth, logicalHeight);
-        };
-        img.src = `data:image/${ENV.VIDEO_FORMAT};base64,${data.frame}`;
+    const handleVideoFrame = (data: any) => {
+      if (!data.frame) {
+        ackFrame(data.sequence);
+        return;
       }
+
+      const img = new Image();
+      img.onload = () => {
+        drawFrame(img);
+        ackFrame(data.sequence);
+      };
+      img.onerror = () => ackFrame(data.sequence);
+      img.src = `data:image/${ENV.VIDEO_FORMAT};base64,${data.frame}`;
     };
 
+    socket.on('video_packet', handleVideoPacket);
     socket.on('video_frame', handleVideoFrame);
     return () => {
+      socket.off('video_packet', handleVideoPacket);
       socket.off('video_frame', handleVideoFrame);
     };
   }, [socket]);
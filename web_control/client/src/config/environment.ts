@@ -16,6 +16,8 @@ export const ENV = {
 
   VIDEO_QUALITY: 80,
   VIDEO_FORMAT: 'jpeg',
+  // 'binary' frames are raw JPEG packets, 'base64' is the legacy JSON payload
+  VIDEO_ENCODING: import.meta.env.VITE_VIDEO_ENCODING || 'binary',
 
   LOG_MAX_ENTRIES: 50,
   DEFAULT_SPEED: 1.0,
@@ -1,6 +1,6 @@
 import { useEffect, useState, useCallback, useRef } from 'react';
 import { io, Socket } from 'socket.io-client';
-import type { SocketStatus, SystemMessage } from '../types';
+import type { RobotState, SocketStatus, StateUpdate, SystemMessage } from '../types';
 import { ENV } from '../config/environment';
 import { KEY_TO_DIRECTION, MESSAGE_TYPES } from '../config/constants';
 
@@ -44,6 +44,9 @@ export const useSocket = () => {
     angles: null
   });
 
+  const [robotState, setRobotState] = useState<RobotState>({});
+  const robotStateRef = useRef<RobotState>({});
+
   const [pressedKeys, setPressedKeys] = useState<Set<string>>(new Set());
   const continuousIntervalRef = useRef<NodeJS.Timeout | null>(null);
   const pressedKeysRef = useRef<Set<string>>(new Set());
@@ -126,6 +129,22 @@ export const useSocket = () => {
       });
     });
 
+    // The server pushes only the fields that changed or were removed, full snapshots replace the state
+    newSocket.on('state_update', (update: StateUpdate) => {
+      const next = update.full ? update.changes : { ...robotStateRef.current, ...update.changes };
+      for (const key of update.removed ?? []) {
+        delete next[key];
+      }
+      robotStateRef.current = next;
+      setRobotState(next);
+
+      if (update.changes.arm_joints) {
+        setArmPositions({
+          angles: [...update.changes.arm_joints.left, ...update.changes.arm_joints.right]
+        });
+      }
+    });
+
     newSocket.on('camera_action_result', (data) => {
       if (data.action === 'reset') {
         const msg = data.status === 'success'
@@ -240,7 +259,7 @@ export const useSocket = () => {
 
   const startVideoStream = useCallback(() => {
     if (socket && status.socket === 'connected') {
-      socket.emit('start_video_stream');
+      socket.emit('start_video_stream', { encoding: ENV.VIDEO_ENCODING, acks: true });
       setStatus(prev => ({ ...prev, video: 'connecting' }));
       addMessage('Starting video stream', MESSAGE_TYPES.INFO);
     }
@@ -265,6 +284,7 @@ export const useSocket = () => {
     telemetry,
     networkMetrics,
     armPositions,
+    robotState,
     pressedKeys,
     stopContinuousMovement,
   };
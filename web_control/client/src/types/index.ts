@@ -9,3 +9,35 @@ export interface SystemMessage {
   timestamp: number;
   type: 'info' | 'success' | 'warning' | 'error';
 }
+
+export interface VideoPacket {
+  test: boolean;
+  width: number;
+  height: number;
+  sequence: number;
+  timestamp: number;
+  cameraId: string;
+  jpeg: Uint8Array<ArrayBuffer>;
+}
+
+export interface RobotState {
+  status?: string;
+  connected?: boolean;
+  robot_type?: string;
+  position?: { x: number; y: number; z: number };
+  rotation?: { roll: number; pitch: number; yaw: number };
+  arm_joints?: { left: number[]; right: number[] };
+  base_joints?: number[];
+  velocity?: {
+    linear: { x: number; y: number; z: number };
+    angular: { x: number; y: number; z: number };
+  };
+}
+
+export interface StateUpdate {
+  sequence: number;
+  full: boolean;
+  changes: Partial<RobotState>;
+  removed: (keyof RobotState)[];
+  timestamp: number;
+}
@@ -0,0 +1,30 @@
+import type { VideoPacket } from '../types';
+
+// Mirrors VIDEO_PACKET_HEADER in web_control/server/api/streaming.py ('<BBHHIdB', little endian)
+const VIDEO_PACKET_VERSION = 1;
+const VIDEO_PACKET_HEADER_SIZE = 19;
+const VIDEO_PACKET_FLAG_TEST = 0x01;
+
+const textDecoder = new TextDecoder();
+
+export const parseVideoPacket = (buffer: ArrayBuffer): VideoPacket | null => {
+  if (buffer.byteLength < VIDEO_PACKET_HEADER_SIZE) return null;
+
+  const view = new DataView(buffer);
+  if (view.getUint8(0) !== VIDEO_PACKET_VERSION) return null;
+
+  const cameraLength = view.getUint8(18);
+  const dataOffset = VIDEO_PACKET_HEADER_SIZE + cameraLength;
+  if (buffer.byteLength <= dataOffset) return null;
+
+  return {
+    test: (view.getUint8(1) & VIDEO_PACKET_FLAG_TEST) !== 0,
+    width: view.getUint16(2, true),
+    height: view.getUint16(4, true),
+    sequence: view.getUint32(6, true),
+    timestamp: view.getFloat64(10, true),
+    cameraId: textDecoder.decode(new Uint8Array(buffer, VIDEO_PACKET_HEADER_SIZE, cameraLength)),
+    // View on the received buffer, the JPEG bytes are not copied
+    jpeg: new Uint8Array(buffer, dataOffset),
+  };
+};
@@ -0,0 +1,90 @@
+import time
+
+
+class _ClientBudget:
+    __slots__ = ('tokens', 'updated', 'violations', 'last_violation', 'penalty_until', 'notice_until')
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.violations = 0
+        self.last_violation = 0.0
+        self.penalty_until = 0.0
+        self.notice_until = 0.0
+
+
+class RateLimiter:
+    """Token bucket rate limiting of client commands.
+
+    Every client holds up to `burst` tokens, refilled at `rate` tokens per
+    second on the monotonic clock, and each command spends one. A client that
+    runs out of tokens `max_violations` times within `penalty_duration` seconds
+    has all its commands rejected for `penalty_duration` seconds. Rejections
+    are coalesced: a client gets at most one throttle notice per penalty
+    window, further rejected commands are dropped silently.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 20, penalty_duration: float = 2.0,
+                 max_violations: int = 3) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.penalty_duration = penalty_duration
+        self.max_violations = max_violations
+        self.clients: dict[str, _ClientBudget] = {}
+
+    def add_client(self, sid: str) -> None:
+        self.clients[sid] = _ClientBudget(self.burst, time.monotonic())
+
+    def remove_client(self, sid: str) -> bool:
+        return self.clients.pop(sid, None) is not None
+
+    def acquire(self, sid: str) -> tuple[bool, bool]:
+        """Spend a token for a command.
+
+        Returns (allowed, notify), notify is set for the first rejected
+        command of a penalty window only.
+        """
+        now = time.monotonic()
+        client = self.clients.get(sid)
+        if client is None:
+            client = self.clients[sid] = _ClientBudget(self.burst, now)
+
+        if now >= client.penalty_until:
+            client.tokens = min(self.burst, client.tokens + (now - client.updated) * self.rate)
+            client.updated = now
+            if client.tokens >= 1.0:
+                client.tokens -= 1.0
+                return True, False
+
+            if now - client.last_violation >= self.penalty_duration:
+                client.violations = 0
+            client.violations += 1
+            client.last_violation = now
+            if client.violations >= self.max_violations:
+                client.violations = 0
+                client.penalty_until = now + self.penalty_duration
+                # Tokens keep refilling during the penalty, the client starts again with a full bucket
+                client.tokens = 0.0
+
+        if now < client.notice_until:
+            return False, False
+        client.notice_until = max(client.penalty_until, now + self.penalty_duration)
+        return False, True
+
+    def retry_after(self, sid: str) -> float:
+        """Get the seconds until a client may send its next command."""
+        client = self.clients.get(sid)
+        if client is None:
+            return 0.0
+        now = time.monotonic()
+        if now < client.penalty_until:
+            return client.penalty_until - now
+        return max(0.0, (1.0 - client.tokens) / self.rate)
+
+    def remaining(self, sid: str) -> int:
+        """Get the number of commands a client may still send right away."""
+        client = self.clients.get(sid)
+        return int(client.tokens) if client is not None else 0
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,102 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from core.remote_core import RemoteCore
+
+
+class StateBroadcaster:
+    """Pushes robot state to a Socket.IO room.
+
+    A single producer checks the remote core's state at `rate_hz` and emits a
+    'state_update' only when it changed, carrying just the top-level fields
+    that changed since the previous update and the ones that were removed
+    ('removed'). Subscribers get the full state
+    when they join and every `keyframe_interval` seconds, so a client can
+    always rebuild the state by applying updates in order.
+    """
+
+    ROOM = 'state'
+
+    def __init__(self, rate_hz: float = 10.0, keyframe_interval: float = 5.0) -> None:
+        self.rate_hz = rate_hz
+        self.keyframe_interval = keyframe_interval
+        self.subscribers: set[str] = set()
+        self.producer: Optional[asyncio.Task] = None
+        self.remote_core: Optional['RemoteCore'] = None
+        self._last_state: dict[str, Any] = {}
+        self._last_keyframe = 0.0
+        self._sequence = 0
+
+    def attach_remote_core(self, remote_core: 'RemoteCore') -> None:
+        self.remote_core = remote_core
+
+    def _current_state(self) -> dict[str, Any]:
+        state = dict(self.remote_core.robot_state)
+        state['robot_type'] = self.remote_core.config.robot_type
+        state['connected'] = self.remote_core.connected
+        return state
+
+    def _update(self, changes: dict[str, Any], full: bool, removed: Optional[list[str]] = None) -> dict:
+        loop = asyncio.get_running_loop()
+        return {
+            'sequence': self._sequence,
+            'full': full,
+            'changes': changes,
+            'removed': removed or [],
+            'timestamp': loop.time()
+        }
+
+    async def subscribe(self, socket_io, sid: str) -> None:
+        if self.remote_core is None:
+            return
+
+        self.subscribers.add(sid)
+        await socket_io.enter_room(sid, self.ROOM)
+        # The full state as of the latest update, later updates apply on top of it
+        snapshot = self._last_state if self._last_state else self._current_state()
+        await socket_io.emit('state_update', self._update(snapshot, full=True), to=sid)
+
+        if self.producer is None:
+            self.producer = asyncio.create_task(self._produce(socket_io))
+
+    def unsubscribe(self, sid: str) -> None:
+        """Forget a client, Socket.IO removes disconnected clients from their rooms itself."""
+        self.subscribers.discard(sid)
+        if not self.subscribers and self.producer is not None:
+            self.producer.cancel()
+            self.producer = None
+
+    async def _produce(self, socket_io) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self.subscribers:
+                state = self._current_state()
+                now = loop.time()
+                full = now - self._last_keyframe >= self.keyframe_interval
+                if full:
+                    changes, removed = state, []
+                    self._last_keyframe = now
+                else:
+                    changes = {
+                        key: value for key, value in state.items()
+                        if key not in self._last_state or self._last_state[key] != value
+                    }
+                    removed = [key for key in self._last_state if key not in state]
+
+                if changes or removed:
+                    self._sequence += 1
+                    self._last_state = state
+                    await socket_io.emit('state_update', self._update(changes, full, removed), room=self.ROOM)
+
+                await asyncio.sleep(1.0 / self.rate_hz)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            print(f"State broadcast error: {exc}")
+        finally:
+            if self.producer is asyncio.current_task():
+                self.producer = None
+
+
+state_broadcaster = StateBroadcaster()
@@ -1,111 +1,238 @@
 import asyncio
-import base64
+import struct
+import time
 from typing import TYPE_CHECKING, Optional
 
 import numpy as np
 
+from core.frame_store import VideoFrame
+
 if TYPE_CHECKING:
     from core.remote_core import RemoteCore
 
+# Binary 'video_packet' events: a fixed header, the camera id, then the JPEG bytes.
+# Header: version, flags, width, height, sequence, timestamp (s), camera id length (little endian).
+VIDEO_PACKET_VERSION = 1
+VIDEO_PACKET_HEADER = struct.Struct('<BBHHIdB')
+VIDEO_PACKET_FLAG_TEST = 0x01
+
+
+def pack_video_packet(frame: VideoFrame, test: bool = False) -> bytes:
+    camera = frame.camera_id.encode('utf-8')
+    flags = VIDEO_PACKET_FLAG_TEST if test else 0
+    header = VIDEO_PACKET_HEADER.pack(
+        VIDEO_PACKET_VERSION, flags, frame.width, frame.height, frame.sequence, frame.timestamp, len(camera)
+    )
+    return b''.join((header, camera, frame.data))
+
+
+class _Viewer:
+    __slots__ = ('sid', 'camera_key', 'binary', 'acks', 'in_flight', 'last_sent', 'dropped')
+
+    def __init__(self, sid: str, camera_key: str, binary: bool, acks: bool) -> None:
+        self.sid = sid
+        self.camera_key = camera_key
+        self.binary = binary
+        self.acks = acks
+        self.in_flight = 0
+        self.last_sent = 0.0
+        self.dropped = 0
+
+    @property
+    def room(self) -> str:
+        return VideoStreamManager.room(self.camera_key, self.binary)
+
 
 class VideoStreamManager:
+    """Broadcasts video frames to Socket.IO rooms.
+
+    One producer task runs per camera while it has viewers. It emits every new
+    frame once to the camera's room, so the payload is encoded once whatever the
+    number of viewers. Viewers that acknowledge frames ('video_frame_ack') get at
+    most `max_in_flight` unacknowledged frames, newer frames are dropped for them
+    until they catch up.
+    """
+
+    DEFAULT_CAMERA = 'default'
 
     def __init__(self) -> None:
         self.streaming = False
         self.frame_rate = 30
         self.frame_interval = 1.0 / self.frame_rate
-        self.stream_tasks: dict[str, asyncio.Task] = {}
+        self.max_in_flight = 2
+        self.ack_timeout = 1.0
+        self.viewers: dict[str, _Viewer] = {}
+        self.producers: dict[str, asyncio.Task] = {}
         self.remote_core: Optional['RemoteCore'] = None
 
+        # Without robot frames, a few test frames encoded once are cycled at a low rate
+        self.idle_frame_rate = 2
+        self.fallback_frame_count = 8
+        self._fallback_frames: Optional[list[VideoFrame]] = None
+        self._fallback_index = -1
+
     def attach_remote_core(self, remote_core: 'RemoteCore') -> None:
         self.remote_core = remote_core
 
-    async def start_stream(self) -> dict:
-        if not self.streaming:
-            self.streaming = True
-            print("Video stream started")
-        return {'status': 'streaming_started'}
-
-    async def stop_stream(self, sid: Optional[str] = None) -> dict:
-        self.streaming = False
+    @staticmethod
+    def room(camera_key: str, binary: bool) -> str:
+        return f"video:{camera_key}:{'binary' if binary else 'base64'}"
+
+    async def start_stream(self, socket_io, sid: str, camera_id: Optional[str] = None,
+                           binary: bool = True, acks: bool = False) -> dict:
+        await self.stop_stream(socket_io, sid)
+
+        viewer = _Viewer(sid, camera_id or self.DEFAULT_CAMERA, binary, acks)
+        self.viewers[sid] = viewer
+        await socket_io.enter_room(sid, viewer.room)
+
+        if viewer.camera_key not in self.producers:
+            self.producers[viewer.camera_key] = asyncio.create_task(
+                self._produce(socket_io, viewer.camera_key)
+            )
+            print(f"Started video producer for camera {viewer.camera_key}")
+
+        self.streaming = True
+        return {'status': 'streaming_started', 'camera_id': viewer.camera_key, 'binary': binary}
+
+    async def stop_stream(self, socket_io, sid: Optional[str] = None) -> dict:
+        sids = [sid] if sid is not None else list(self.viewers)
+        for viewer_sid in sids:
+            viewer = self.viewers.pop(viewer_sid, None)
+            if viewer is None:
+                continue
+            await socket_io.leave_room(viewer_sid, viewer.room)
+            if viewer.dropped:
+                print(f"Dropped {viewer.dropped} frames for slow client {viewer_sid}")
+
+        self._stop_idle_producers()
+        self.streaming = bool(self.viewers)
+        return {'status': 'streaming_stopped'}
 
-        if sid and sid in self.stream_tasks:
-            task = self.stream_tasks.pop(sid)
-            if not task.cancelled():
+    def remove_viewer(self, sid: str) -> None:
+        """Forget a disconnected client, Socket.IO already removed it from its rooms."""
+        if self.viewers.pop(sid, None) is not None:
+            self._stop_idle_producers()
+            self.streaming = bool(self.viewers)
+
+    def frame_acked(self, sid: str) -> None:
+        viewer = self.viewers.get(sid)
+        if viewer is not None and viewer.in_flight > 0:
+            viewer.in_flight -= 1
+
+    def _stop_idle_producers(self) -> None:
+        watched = {viewer.camera_key for viewer in self.viewers.values()}
+        for camera_key in list(self.producers):
+            if camera_key not in watched:
+                task = self.producers.pop(camera_key)
                 task.cancel()
-                print(f"Cancelled video stream task for client {sid}")
-        elif sid is None:
-            for client_sid, task in list(self.stream_tasks.items()):
-                if not task.cancelled():
-                    task.cancel()
-                    print(f"Cancelled video stream task for client {client_sid}")
-            self.stream_tasks.clear()
-
-        print("Video stream stopped")
-        return {'status': 'streaming_stopped'}
+                print(f"Stopped video producer for camera {camera_key}")
 
-    def _generate_fallback_frame(self) -> Optional[str]:
+    def _generate_fallback_frames(self) -> list[VideoFrame]:
         try:
             import cv2
         except ImportError:
+            return []
+
+        frames = []
+        rng = np.random.default_rng()
+        for index in range(self.fallback_frame_count):
+            # Coarse noise keeps the JPEGs small, at 2 Hz they cost next to no bandwidth
+            noise = rng.integers(0, 255, (60, 80, 3), dtype=np.uint8)
+            test_frame = cv2.resize(noise, (640, 480), interpolation=cv2.INTER_NEAREST)
+            cv2.putText(test_frame, 'NO SIGNAL', (170, 255), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 4)
+            success, buffer = cv2.imencode('.jpg', test_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            if success:
+                frames.append(VideoFrame('test', buffer.tobytes(), index + 1, 640, 480))
+        return frames
+
+    def _fallback_frame(self) -> Optional[VideoFrame]:
+        # Encoded once and cycled, base64 is cached on each frame as well
+        if self._fallback_frames is None:
+            self._fallback_frames = self._generate_fallback_frames()
+        if not self._fallback_frames:
             return None
+        self._fallback_index = (self._fallback_index + 1) % len(self._fallback_frames)
+        return self._fallback_frames[self._fallback_index]
 
-        test_frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
-        success, buffer = cv2.imencode('.jpg', test_frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        if not success:
-            return None
-
-        return base64.b64encode(buffer).decode('utf-8')
-
-    async def get_frame(self) -> Optional[dict]:
-        frame_base64 = None
-        source = 'test'
-
+    def _current_frame(self, camera_key: str) -> tuple[Optional[VideoFrame], str]:
         if self.remote_core and self.remote_core.connected:
             try:
-                frame_base64 = await self.remote_core.get_camera_frame_base64()
-                if frame_base64:
-                    source = self.remote_core.config.robot_type.lower()
+                camera_id = None if camera_key == self.DEFAULT_CAMERA else camera_key
+                frame = self.remote_core.get_video_frame(camera_id)
+                if frame:
+                    return frame, self.remote_core.config.robot_type.lower()
             except Exception as exc:
                 print(f"Error getting frame from remote core: {exc}")
 
-        if not frame_base64:
-            frame_base64 = self._generate_fallback_frame()
-            if frame_base64:
-                source = 'test_jpeg'
-
-        if not frame_base64:
-            return None
+        frame = self._fallback_frame()
+        return frame, 'test_jpeg' if frame else 'test'
 
-        loop = asyncio.get_running_loop()
+    @staticmethod
+    def _payload(frame: VideoFrame, source: str) -> dict:
+        # Legacy JSON payload, base64 is encoded once per frame and shared by all its viewers
         return {
-            'frame': frame_base64,
-            'width': 640,
-            'height': 480,
+            'frame': frame.base64,
+            'camera_id': frame.camera_id,
+            'sequence': frame.sequence,
+            'width': frame.width,
+            'height': frame.height,
             'channels': 3,
-            'timestamp': loop.time(),
+            'timestamp': frame.timestamp,
             'source': source
         }
 
-    async def stream_frames(self, socket_io, sid: str) -> None:
-        print(f"Starting video stream for client {sid}")
+    def _ready_viewers(self, room_viewers: list[_Viewer], now: float) -> tuple[list[_Viewer], list[str]]:
+        ready, skipped = [], []
+        for viewer in room_viewers:
+            if viewer.acks and viewer.in_flight >= self.max_in_flight:
+                if now - viewer.last_sent < self.ack_timeout:
+                    viewer.dropped += 1
+                    skipped.append(viewer.sid)
+                    continue
+                # No ack for too long, assume they were lost rather than stall the client forever
+                viewer.in_flight = 0
+            ready.append(viewer)
+        return ready, skipped
+
+    async def _produce(self, socket_io, camera_key: str) -> None:
+        last_key = None
         try:
-            while self.streaming:
-                if asyncio.current_task().cancelled():
-                    break
-
-                frame_data = await self.get_frame()
-                if frame_data:
-                    await socket_io.emit('video_frame', frame_data, to=sid)
-
-                await asyncio.sleep(self.frame_interval)
+            while True:
+                frame, source = self._current_frame(camera_key)
+                # The fallback and the robot camera number their frames independently
+                if frame is not None and (frame.camera_id, frame.sequence) != last_key:
+                    last_key = (frame.camera_id, frame.sequence)
+                    now = time.monotonic()
+                    for binary in (True, False):
+                        room_viewers = [
+                            viewer for viewer in self.viewers.values()
+                            if viewer.camera_key == camera_key and viewer.binary == binary
+                        ]
+                        if not room_viewers:
+                            continue
+                        ready, skipped = self._ready_viewers(room_viewers, now)
+                        if not ready:
+                            continue
+                        if binary:
+                            event, payload = 'video_packet', pack_video_packet(frame, test=source == 'test_jpeg')
+                        else:
+                            event, payload = 'video_frame', self._payload(frame, source)
+                        await socket_io.emit(event, payload, room=self.room(camera_key, binary), skip_sid=skipped)
+                        for viewer in ready:
+                            viewer.in_flight += 1
+                            viewer.last_sent = now
+
+                # Fallback frames are paced by their source, a robot camera may be named 'test' too
+                idle = frame is None or source == 'test_jpeg'
+                await asyncio.sleep(1.0 / self.idle_frame_rate if idle else self.frame_interval)
         except asyncio.CancelledError:
             pass
         except Exception as exc:
-            print(f"Stream error for client {sid}: {exc}")
+            print(f"Video producer error for camera {camera_key}: {exc}")
         finally:
-            self.stream_tasks.pop(sid, None)
-            print(f"Video stream ended for client {sid}")
+            if self.producers.get(camera_key) is asyncio.current_task():
+                del self.producers[camera_key]
 
 
 video_manager = VideoStreamManager()
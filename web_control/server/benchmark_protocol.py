@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the protocol serializers.
+
+Measures encode and decode throughput and the encoded size of a typical
+message of every command and response type, for every installed serializer.
+
+Usage:
+    python benchmark_protocol.py [--iterations 20000] [--video-kb 40]
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+from core.protocol import CommandType, ResponseType, RobotProtocol
+from core.serializers import available_serializers, get_serializer
+
+
+def build_messages(protocol: RobotProtocol, video_kb: int) -> List[Tuple[str, Callable[[], bytes]]]:
+    """Build the benchmarked messages as (name, encoder) tuples."""
+    state = {
+        'status': 'connected',
+        'position': {'x': 0.12, 'y': -0.34, 'z': 0.0},
+        'rotation': {'roll': 0.0, 'pitch': 0.01, 'yaw': 1.57},
+        'arm_joints': {'left': [0.1, -0.2, 0.3, -0.4, 0.5, 0.6], 'right': [0.6, 0.5, -0.4, 0.3, -0.2, 0.1]},
+        'base_joints': [0.12, -0.34, 1.57],
+        'velocity': {'linear': {'x': 0.1, 'y': 0.0, 'z': 0.0}, 'angular': {'x': 0.0, 'y': 0.0, 'z': 0.05}},
+    }
+    jpeg = os.urandom(video_kb * 1024)
+
+    commands = {
+        CommandType.MOVE: lambda: protocol.encode_move_command('forward', 0.8),
+        CommandType.SET_ARM_JOINT: lambda: protocol.encode_arm_joint_command('left', 3, 0.785),
+        CommandType.SET_CAMERA_POSITION: lambda: protocol.encode_camera_command([2.0, 2.0, 2.0], [0.0, 0.0, 0.0]),
+        CommandType.PING: lambda: protocol.encode_command(CommandType.PING, {'serializers': available_serializers()}),
+    }
+    responses = {
+        ResponseType.SUCCESS: lambda: protocol.create_success_response({'message': 'Reset command sent'}),
+        ResponseType.ERROR: lambda: protocol.create_error_response('Unknown command: fly'),
+        ResponseType.STATE: lambda: protocol.encode_response(ResponseType.STATE, state),
+        ResponseType.VIDEO: lambda: protocol.encode_video_frame(jpeg, 640, 480),
+        ResponseType.PONG: lambda: protocol.encode_response(ResponseType.PONG, {'timestamp': time.time()}),
+    }
+
+    messages = []
+    for command_type in CommandType:
+        encoder = commands.get(command_type, lambda command_type=command_type: protocol.encode_command(command_type))
+        messages.append((f"command/{command_type.value}", encoder))
+    for response_type in ResponseType:
+        messages.append((f"response/{response_type.value}", responses[response_type]))
+    return messages
+
+
+def measure(function: Callable[[], object], iterations: int) -> float:
+    """Get the throughput of a function in calls per second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return iterations / (time.perf_counter() - start)
+
+
+def run(iterations: int, video_kb: int) -> Dict[str, Dict[str, Tuple[int, float, float]]]:
+    """Benchmark every message with every installed serializer.
+
+    Returns:
+        {serializer: {message: (size in bytes, encodes per second, decodes per second)}}
+    """
+    results = {}
+    for name in available_serializers():
+        protocol = RobotProtocol(get_serializer(name))
+        results[name] = {}
+        for message, encoder in build_messages(protocol, video_kb):
+            encoded = encoder()
+            # Decoding auto-detects the format, time the serializer's own decoder instead
+            decoder = protocol.serializer.loads
+            # Video messages are large, a tenth of the iterations is enough to time them
+            count = max(iterations // 10, 1) if message == 'response/video' else iterations
+            results[name][message] = (
+                len(encoded),
+                measure(encoder, count),
+                measure(lambda: decoder(encoded), count),
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='Encode/decode calls per message')
+    parser.add_argument('--video-kb', type=int, default=40, help='Size of the JPEG in video messages')
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.video_kb)
+    print(f"Serializers: {', '.join(results)}")
+    print(f"{'serializer':<10} {'message':<32} {'bytes':>8} {'encode/s':>12} {'decode/s':>12}")
+    for name, messages in results.items():
+        for message, (size, encodes, decodes) in messages.items():
+            print(f"{name:<10} {message:<32} {size:>8} {encodes:>12,.0f} {decodes:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from typing import Optional
 from pathlib import Path
 
+from .serializers import get_serializer
+
 
 @dataclass
 class ServerConfig:
@@ -37,6 +39,12 @@ class ServerConfig:
     connect_timeout_s: int = 5
     polling_timeout_ms: int = 100
 
+    # State Push - robot state is broadcast to clients on change, at most at this rate
+    state_push_hz: float = 10.0
+
+    # Message serializer - auto negotiates the best one installed on both ends
+    serializer: str = "auto"      # auto|json|orjson|msgpack
+
     @classmethod
     def from_env(cls, env_file: Optional[str] = None) -> "ServerConfig":
         """Load configuration from environment variables.
@@ -72,6 +80,12 @@ class ServerConfig:
             # Connection Settings
             connect_timeout_s=int(os.getenv('CONNECT_TIMEOUT_S', '5')),
             polling_timeout_ms=int(os.getenv('POLLING_TIMEOUT_MS', '100')),
+
+            # State Push
+            state_push_hz=float(os.getenv('STATE_PUSH_HZ', '10')),
+
+            # Message serializer
+            serializer=os.getenv('SERIALIZER', 'auto'),
         )
 
     @staticmethod
@@ -110,6 +124,12 @@ class ServerConfig:
         if not (1 <= self.video_fps <= 120):
             raise ValueError(f"Invalid video_fps: {self.video_fps}. Must be between 1-120")
 
+        if not (0 < self.state_push_hz <= 120):
+            raise ValueError(f"Invalid state_push_hz: {self.state_push_hz}. Must be between 0-120")
+
+        if self.serializer != 'auto':
+            get_serializer(self.serializer)
+
     def get_robot_cmd_address(self) -> str:
         """Get the full ZeroMQ address for robot command channel."""
         return f"tcp://{self.robot_host}:{self.robot_port_cmd}"
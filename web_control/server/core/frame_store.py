@@ -0,0 +1,82 @@
+"""
+Latest video frame per camera, shared by every consumer of the remote core.
+
+Each received frame is stored once as an immutable JPEG buffer together with a
+per-camera sequence number. Consumers read the buffer directly (binary Socket.IO
+attachments need no copy) and only legacy clients pay for a base64 encoding,
+which is computed on first use and then shared by all of them.
+"""
+
+import base64
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class VideoFrame:
+    """One immutable JPEG frame of a camera."""
+
+    camera_id: str
+    data: bytes
+    sequence: int
+    width: int
+    height: int
+    timestamp: float = field(default_factory=time.time)
+
+    @cached_property
+    def base64(self) -> str:
+        """Base64 encoding of the JPEG buffer, computed once on demand."""
+        return base64.b64encode(self.data).decode('utf-8')
+
+
+class FrameStore:
+    """Keeps the newest frame of every camera."""
+
+    def __init__(self):
+        self._frames: Dict[str, VideoFrame] = {}
+        self._sequences: Dict[str, int] = {}
+        self.default_camera: Optional[str] = None
+
+    def update(self, camera_id: str, data: bytes, width: int, height: int) -> VideoFrame:
+        """Store a new frame and bump the camera's sequence number.
+
+        Args:
+            camera_id: Camera identifier
+            data: JPEG encoded frame, kept as is (not copied)
+            width: Frame width
+            height: Frame height
+
+        Returns:
+            The stored frame
+        """
+        sequence = self._sequences.get(camera_id, 0) + 1
+        self._sequences[camera_id] = sequence
+        frame = VideoFrame(camera_id, data, sequence, width, height)
+        self._frames[camera_id] = frame
+        if self.default_camera is None:
+            self.default_camera = camera_id
+        return frame
+
+    def get(self, camera_id: Optional[str] = None) -> Optional[VideoFrame]:
+        """Get the newest frame of a camera (the first camera seen if not given)."""
+        if camera_id is None:
+            camera_id = self.default_camera
+        if camera_id is None:
+            return None
+        return self._frames.get(camera_id)
+
+    def sequence(self, camera_id: Optional[str] = None) -> int:
+        """Get the sequence number of a camera's newest frame, 0 before the first frame."""
+        frame = self.get(camera_id)
+        return frame.sequence if frame else 0
+
+    def cameras(self) -> list:
+        """Get the identifiers of all cameras that delivered a frame."""
+        return list(self._frames)
+
+    def clear(self) -> None:
+        """Drop all frames, sequence numbers keep increasing across clears."""
+        self._frames.clear()
+        self.default_camera = None
@@ -5,12 +5,14 @@ This defines the standard message format and encoding/decoding functions
 for communication between the remote core and robot hosts.
 """
 
-import json
 import base64
+import struct
 import time
 from typing import Dict, Any, Optional, List
 from enum import Enum
 
+from .serializers import JSON, Serializer, serializer_for
+
 
 class CommandType(Enum):
     """Standard command types for robot control."""
@@ -24,6 +26,13 @@ class CommandType(Enum):
     PING = "ping"
 
 
+# Binary video frames skip the JSON/base64 envelope: a fixed header, the camera id, then the JPEG bytes.
+# Header: magic, version, width, height, JPEG quality, camera id length (little endian).
+VIDEO_FRAME_MAGIC = b"XLVF"
+VIDEO_FRAME_VERSION = 1
+VIDEO_FRAME_HEADER = struct.Struct("<4sBHHBB")
+
+
 class ResponseType(Enum):
     """Standard response types from robot hosts."""
     SUCCESS = "success"
@@ -34,15 +43,29 @@ class ResponseType(Enum):
 
 
 class RobotProtocol:
-    """Unified protocol for robot communication."""
+    """Unified protocol for robot communication.
+
+    Messages are encoded with the serializer negotiated with the robot host
+    (JSON until then). Received messages are decoded with whichever
+    serializer produced them.
+    """
+
+    def __init__(self, serializer: Serializer = JSON):
+        """Initialize the protocol.
 
-    @staticmethod
-    def encode_command(command_type: CommandType, data: Optional[Dict[str, Any]] = None) -> bytes:
+        Args:
+            serializer: Serializer used to encode outgoing messages
+        """
+        self.serializer = serializer
+
+    def encode_command(self, command_type: CommandType, data: Optional[Dict[str, Any]] = None,
+                       message_id: Optional[int] = None) -> bytes:
         """Encode a command message for sending to robot host.
 
         Args:
             command_type: Type of command to send
             data: Optional command data/parameters
+            message_id: Optional message ID, echoed by the host in its reply
 
         Returns:
             Encoded message as bytes
@@ -53,10 +76,11 @@ class RobotProtocol:
             "data": data or {},
             "timestamp": time.time()
         }
-        return json.dumps(message).encode('utf-8')
+        if message_id is not None:
+            message["id"] = message_id
+        return self.serializer.dumps(message)
 
-    @staticmethod
-    def decode_response(raw_data: bytes) -> Dict[str, Any]:
+    def decode_response(self, raw_data: bytes) -> Dict[str, Any]:
         """Decode response message from robot host.
 
         Args:
@@ -66,9 +90,9 @@ class RobotProtocol:
             Decoded message dictionary
         """
         try:
-            message = json.loads(raw_data.decode('utf-8'))
+            message = serializer_for(raw_data).loads(raw_data)
             return message
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        except ValueError as e:
             return {
                 "type": "error",
                 "response": ResponseType.ERROR.value,
@@ -76,13 +100,14 @@ class RobotProtocol:
                 "timestamp": time.time()
             }
 
-    @staticmethod
-    def encode_response(response_type: ResponseType, data: Optional[Dict[str, Any]] = None) -> bytes:
+    def encode_response(self, response_type: ResponseType, data: Optional[Dict[str, Any]] = None,
+                        message_id: Optional[int] = None) -> bytes:
         """Encode a response message for sending from robot host.
 
         Args:
             response_type: Type of response
             data: Response data
+            message_id: ID of the command this response replies to, if any
 
         Returns:
             Encoded message as bytes
@@ -93,10 +118,11 @@ class RobotProtocol:
             "data": data or {},
             "timestamp": time.time()
         }
-        return json.dumps(message).encode('utf-8')
+        if message_id is not None:
+            message["id"] = message_id
+        return self.serializer.dumps(message)
 
-    @staticmethod
-    def decode_command(raw_data: bytes) -> Dict[str, Any]:
+    def decode_command(self, raw_data: bytes) -> Dict[str, Any]:
         """Decode command message from remote core.
 
         Args:
@@ -106,9 +132,9 @@ class RobotProtocol:
             Decoded command dictionary
         """
         try:
-            message = json.loads(raw_data.decode('utf-8'))
+            message = serializer_for(raw_data).loads(raw_data)
             return message
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        except ValueError as e:
             return {
                 "type": "error",
                 "command": "invalid",
@@ -116,46 +142,50 @@ class RobotProtocol:
                 "timestamp": time.time()
             }
 
-    @staticmethod
-    def encode_move_command(direction: str, speed: float = 1.0) -> bytes:
+    def encode_move_command(self, direction: str, speed: float = 1.0, message_id: Optional[int] = None) -> bytes:
         """Encode a move command.
 
         Args:
             direction: Movement direction (forward, backward, left, right, etc.)
             speed: Movement speed (0.0 to 1.0)
+            message_id: Optional message ID
 
         Returns:
             Encoded move command
         """
-        return RobotProtocol.encode_command(
+        return self.encode_command(
             CommandType.MOVE,
-            {"direction": direction, "speed": speed}
+            {"direction": direction, "speed": speed},
+            message_id
         )
 
-    @staticmethod
-    def encode_arm_joint_command(arm: str, joint_index: int, angle: float) -> bytes:
+    def encode_arm_joint_command(self, arm: str, joint_index: int, angle: float,
+                                 message_id: Optional[int] = None) -> bytes:
         """Encode an arm joint control command.
 
         Args:
             arm: Arm identifier (e.g., "left", "right")
             joint_index: Joint index (0-based)
             angle: Target joint angle in radians
+            message_id: Optional message ID
 
         Returns:
             Encoded joint command
         """
-        return RobotProtocol.encode_command(
+        return self.encode_command(
             CommandType.SET_ARM_JOINT,
-            {"arm": arm, "joint_index": joint_index, "angle": angle}
+            {"arm": arm, "joint_index": joint_index, "angle": angle},
+            message_id
         )
 
-    @staticmethod
-    def encode_camera_command(position: List[float], target: Optional[List[float]] = None) -> bytes:
+    def encode_camera_command(self, position: List[float], target: Optional[List[float]] = None,
+                              message_id: Optional[int] = None) -> bytes:
         """Encode a camera position command.
 
         Args:
             position: Camera position [x, y, z]
             target: Optional camera target [x, y, z]
+            message_id: Optional message ID
 
         Returns:
             Encoded camera command
@@ -163,10 +193,9 @@ class RobotProtocol:
         data = {"position": position}
         if target:
             data["target"] = target
-        return RobotProtocol.encode_command(CommandType.SET_CAMERA_POSITION, data)
+        return self.encode_command(CommandType.SET_CAMERA_POSITION, data, message_id)
 
-    @staticmethod
-    def encode_video_frame(frame_data: bytes, width: int, height: int,
+    def encode_video_frame(self, frame_data: bytes, width: int, height: int,
                           quality: int = 80, camera_id: str = "main") -> bytes:
         """Encode a video frame for transmission.
 
@@ -180,19 +209,19 @@ class RobotProtocol:
         Returns:
             Encoded video message
         """
-        frame_b64 = base64.b64encode(frame_data).decode('utf-8')
+        # Serializers that carry bytes send the JPEG as is
+        frame = frame_data if self.serializer.supports_bytes else base64.b64encode(frame_data).decode('utf-8')
         data = {
-            "frame": frame_b64,
+            "frame": frame,
             "width": width,
             "height": height,
             "quality": quality,
             "camera_id": camera_id,
             "format": "jpeg"
         }
-        return RobotProtocol.encode_response(ResponseType.VIDEO, data)
+        return self.encode_response(ResponseType.VIDEO, data)
 
-    @staticmethod
-    def decode_video_frame(message: Dict[str, Any]) -> Optional[bytes]:
+    def decode_video_frame(self, message: Dict[str, Any]) -> Optional[bytes]:
         """Decode video frame from message.
 
         Args:
@@ -206,16 +235,69 @@ class RobotProtocol:
                 return None
 
             data = message.get("data", {})
-            frame_b64 = data.get("frame")
-            if not frame_b64:
+            frame = data.get("frame")
+            if not frame:
                 return None
 
-            return base64.b64decode(frame_b64)
+            if isinstance(frame, bytes):
+                return frame
+            return base64.b64decode(frame)
         except Exception:
             return None
 
-    @staticmethod
-    def encode_robot_state(position: Dict[str, float], rotation: Dict[str, float],
+    def encode_video_frame_binary(self, frame_data: bytes, width: int, height: int,
+                                  quality: int = 80, camera_id: str = "main") -> bytes:
+        """Encode a video frame as a binary message.
+
+        Args:
+            frame_data: Raw image data (JPEG encoded)
+            width: Frame width
+            height: Frame height
+            quality: JPEG quality
+            camera_id: Camera identifier
+
+        Returns:
+            Header, camera id and JPEG bytes
+        """
+        camera = camera_id.encode('utf-8')
+        header = VIDEO_FRAME_HEADER.pack(VIDEO_FRAME_MAGIC, VIDEO_FRAME_VERSION, width, height, quality, len(camera))
+        return b"".join((header, camera, frame_data))
+
+    def is_binary_video_frame(self, raw_data: bytes) -> bool:
+        """Check if a received message is a binary video frame rather than JSON."""
+        return raw_data[:len(VIDEO_FRAME_MAGIC)] == VIDEO_FRAME_MAGIC
+
+    def decode_video_frame_binary(self, raw_data: bytes) -> Optional[Dict[str, Any]]:
+        """Decode a binary video frame message.
+
+        Args:
+            raw_data: Raw bytes received from robot
+
+        Returns:
+            Video data with the same fields as a JSON video message, with the
+            JPEG bytes in "frame", or None if invalid
+        """
+        if len(raw_data) < VIDEO_FRAME_HEADER.size:
+            return None
+
+        magic, version, width, height, quality, camera_len = VIDEO_FRAME_HEADER.unpack_from(raw_data)
+        if magic != VIDEO_FRAME_MAGIC or version != VIDEO_FRAME_VERSION:
+            return None
+
+        start = VIDEO_FRAME_HEADER.size + camera_len
+        if len(raw_data) <= start:
+            return None
+
+        return {
+            "frame": raw_data[start:],
+            "width": width,
+            "height": height,
+            "quality": quality,
+            "camera_id": raw_data[VIDEO_FRAME_HEADER.size:start].decode('utf-8'),
+            "format": "jpeg"
+        }
+
+    def encode_robot_state(self, position: Dict[str, float], rotation: Dict[str, float],
                           arm_joints: Dict[str, List[float]], status: str = "connected") -> bytes:
         """Encode robot state information.
 
@@ -235,10 +317,9 @@ class RobotProtocol:
             "status": status,
             "timestamp": time.time()
         }
-        return RobotProtocol.encode_response(ResponseType.STATE, data)
+        return self.encode_response(ResponseType.STATE, data)
 
-    @staticmethod
-    def is_valid_message(message: Dict[str, Any]) -> bool:
+    def is_valid_message(self, message: Dict[str, Any]) -> bool:
         """Check if a message has valid structure.
 
         Args:
@@ -259,8 +340,7 @@ class RobotProtocol:
 
         return False
 
-    @staticmethod
-    def create_error_response(error_message: str) -> bytes:
+    def create_error_response(self, error_message: str) -> bytes:
         """Create a standard error response.
 
         Args:
@@ -269,13 +349,12 @@ class RobotProtocol:
         Returns:
             Encoded error response
         """
-        return RobotProtocol.encode_response(
+        return self.encode_response(
             ResponseType.ERROR,
             {"message": error_message}
         )
 
-    @staticmethod
-    def create_success_response(data: Optional[Dict[str, Any]] = None) -> bytes:
+    def create_success_response(self, data: Optional[Dict[str, Any]] = None) -> bytes:
         """Create a standard success response.
 
         Args:
@@ -284,4 +363,4 @@ class RobotProtocol:
         Returns:
             Encoded success response
         """
-        return RobotProtocol.encode_response(ResponseType.SUCCESS, data or {})
\ No newline at end of file
+        return self.encode_response(ResponseType.SUCCESS, data or {})
\ No newline at end of file
@@ -7,15 +7,18 @@ with robot hosts via ZeroMQ.
 """
 
 import asyncio
+import itertools
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import zmq
 import zmq.asyncio
 
 from .config import ServerConfig
+from .frame_store import FrameStore, VideoFrame
 from .protocol import RobotProtocol, CommandType, ResponseType
+from .serializers import available_serializers, choose_serializer
 
 
 class RemoteCore:
@@ -35,11 +38,20 @@ class RemoteCore:
         self.cmd_socket: Optional[zmq.asyncio.Socket] = None
         self.data_socket: Optional[zmq.asyncio.Socket] = None
 
+        # Message encoding, JSON until a serializer is negotiated on connect
+        self.protocol = RobotProtocol()
+
         # Connection state
         self.connected = False
         self.last_ping_time = 0
         self.ping_interval = 5.0  # Ping every 5 seconds
 
+        # Request/response correlation: every command carries an ID, hosts echo it in their
+        # reply and the data receiver resolves the matching future
+        self._message_ids = itertools.count(1)
+        self._pending: Dict[int, Tuple[CommandType, asyncio.Future]] = {}
+        self._tasks: List[asyncio.Task] = []
+
         # Robot state cache
         self.robot_state = {
             'status': 'disconnected',
@@ -53,6 +65,9 @@ class RemoteCore:
             }
         }
 
+        # Latest video frame per camera
+        self.frames = FrameStore()
+
         # Setup logging
         self.logger = logging.getLogger(f"RemoteCore-{config.robot_type}")
         self.logger.setLevel(logging.INFO)
@@ -87,6 +102,9 @@ class RemoteCore:
 
             self.logger.info(f"ZeroMQ sockets connected")
 
+            # The data receiver is the only reader of the data socket, it also delivers the pong
+            self._tasks.append(asyncio.create_task(self._data_receiver_loop()))
+
             # Test connection with ping
             ping_success = await self._ping_robot()
             if ping_success:
@@ -95,8 +113,7 @@ class RemoteCore:
                 self.logger.info(f"Successfully connected to {self.config.robot_type} host")
 
                 # Start background tasks
-                asyncio.create_task(self._data_receiver_loop())
-                asyncio.create_task(self._ping_loop())
+                self._tasks.append(asyncio.create_task(self._ping_loop()))
 
                 return True
             else:
@@ -118,6 +135,19 @@ class RemoteCore:
         try:
             self.connected = False
             self.robot_state['status'] = 'disconnected'
+            self.frames.clear()
+            self.protocol = RobotProtocol()
+
+            current_task = asyncio.current_task()
+            for task in self._tasks:
+                if task is not current_task:
+                    task.cancel()
+            self._tasks.clear()
+
+            for _, future in self._pending.values():
+                if not future.done():
+                    future.cancel()
+            self._pending.clear()
 
             if self.cmd_socket:
                 self.cmd_socket.close()
@@ -152,7 +182,7 @@ class RemoteCore:
             speed = max(0.0, min(1.0, speed))  # Clamp speed to [0, 1]
 
             # Send move command
-            cmd_data = RobotProtocol.encode_move_command(direction, speed)
+            cmd_data = self.protocol.encode_move_command(direction, speed, self._next_message_id())
             await self.cmd_socket.send(cmd_data)
 
             self.logger.debug(f"Sent move command: {direction} @ {speed}")
@@ -188,13 +218,14 @@ class RemoteCore:
         state['timestamp'] = time.time()
         return state
 
-    async def set_arm_joint(self, arm: str, joint_index: int, angle: float) -> Dict[str, Any]:
+    async def set_arm_joint(self, arm: str, joint_index: int, angle: float, wait: bool = False) -> Dict[str, Any]:
         """Set arm joint angle.
 
         Args:
             arm: Arm identifier ("left" or "right")
             joint_index: Joint index (0-based)
             angle: Target angle in radians
+            wait: Wait for the host's reply instead of returning once sent
 
         Returns:
             Response dictionary with status
@@ -203,8 +234,15 @@ class RemoteCore:
             return {'status': 'error', 'message': 'Not connected to robot host'}
 
         try:
-            cmd_data = RobotProtocol.encode_arm_joint_command(arm, joint_index, angle)
-            await self.cmd_socket.send(cmd_data)
+            if wait:
+                response = await self.request(
+                    CommandType.SET_ARM_JOINT, {'arm': arm, 'joint_index': joint_index, 'angle': angle}
+                )
+                if response.get('response') == ResponseType.ERROR.value:
+                    return {'status': 'error', 'message': response.get('data', {}).get('message', 'Unknown error')}
+            else:
+                cmd_data = self.protocol.encode_arm_joint_command(arm, joint_index, angle, self._next_message_id())
+                await self.cmd_socket.send(cmd_data)
 
             self.logger.debug(f"Sent arm joint command: {arm}[{joint_index}] = {angle}")
 
@@ -215,6 +253,8 @@ class RemoteCore:
                 'angle': angle
             }
 
+        except asyncio.TimeoutError:
+            return {'status': 'error', 'message': 'Robot host did not reply in time'}
         except Exception as e:
             self.logger.error(f"Arm joint command failed: {e}")
             return {'status': 'error', 'message': str(e)}
@@ -229,7 +269,7 @@ class RemoteCore:
             return {'status': 'error', 'message': 'Not connected to robot host'}
 
         try:
-            cmd_data = RobotProtocol.encode_command(CommandType.RESET)
+            cmd_data = self.protocol.encode_command(CommandType.RESET, message_id=self._next_message_id())
             await self.cmd_socket.send(cmd_data)
 
             self.logger.info("Sent reset command")
@@ -240,21 +280,42 @@ class RemoteCore:
             self.logger.error(f"Reset command failed: {e}")
             return {'status': 'error', 'message': str(e)}
 
-    async def get_camera_frame(self) -> Optional[bytes]:
+    async def get_camera_frame(self, camera_id: Optional[str] = None) -> Optional[bytes]:
         """Get latest camera frame bytes.
 
+        Args:
+            camera_id: Optional camera identifier, defaults to the first camera
+
         Returns:
             Raw JPEG bytes or None if unavailable
         """
-        return getattr(self, '_last_frame_bytes', None)
+        frame = self.frames.get(camera_id)
+        return frame.data if frame else None
 
-    async def get_camera_frame_base64(self) -> Optional[str]:
+    async def get_camera_frame_base64(self, camera_id: Optional[str] = None) -> Optional[str]:
         """Get latest camera frame as base64 string.
 
+        The encoding is computed on first request and shared by later callers.
+
+        Args:
+            camera_id: Optional camera identifier, defaults to the first camera
+
         Returns:
             Base64 encoded JPEG frame or None if unavailable
         """
-        return getattr(self, '_last_frame_b64', None)
+        frame = self.frames.get(camera_id)
+        return frame.base64 if frame else None
+
+    def get_video_frame(self, camera_id: Optional[str] = None) -> Optional[VideoFrame]:
+        """Get latest camera frame with its sequence number and size.
+
+        Args:
+            camera_id: Optional camera identifier, defaults to the first camera
+
+        Returns:
+            Immutable video frame or None if unavailable
+        """
+        return self.frames.get(camera_id)
 
     async def set_camera_position(self, position: List[float], target: Optional[List[float]] = None) -> Dict[str, Any]:
         """Set camera position and target.
@@ -270,7 +331,7 @@ class RemoteCore:
             return {'status': 'error', 'message': 'Not connected to robot host'}
 
         try:
-            cmd_data = RobotProtocol.encode_camera_command(position, target)
+            cmd_data = self.protocol.encode_camera_command(position, target, self._next_message_id())
             await self.cmd_socket.send(cmd_data)
 
             self.logger.debug(f"Sent camera command: pos={position}, target={target}")
@@ -295,7 +356,7 @@ class RemoteCore:
             return {'status': 'error', 'message': 'Not connected to robot host'}
 
         try:
-            cmd_data = RobotProtocol.encode_command(CommandType.RESET_CAMERA)
+            cmd_data = self.protocol.encode_command(CommandType.RESET_CAMERA, message_id=self._next_message_id())
             await self.cmd_socket.send(cmd_data)
 
             self.logger.debug("Sent camera reset command")
@@ -323,43 +384,94 @@ class RemoteCore:
             'connected': self.connected
         }
 
-    async def _ping_robot(self) -> bool:
-        """Ping the robot host to test connectivity.
+    def _next_message_id(self) -> int:
+        """Get a new command message ID."""
+        return next(self._message_ids)
+
+    async def request(self, command_type: CommandType, data: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a command and wait for the host's reply to it.
+
+        Any number of requests can be in flight, replies are matched by message ID.
+
+        Args:
+            command_type: Type of command to send
+            data: Optional command data/parameters
+            timeout: Seconds to wait for the reply, defaults to the connect timeout
 
         Returns:
-            True if ping successful
+            Decoded reply message
+
+        Raises:
+            asyncio.TimeoutError: If no reply arrived in time
         """
+        message_id = self._next_message_id()
+        cmd_data = self.protocol.encode_command(command_type, data, message_id)
+        return await self._send_request(command_type, message_id, cmd_data, timeout)
+
+    async def _send_request(self, command_type: CommandType, message_id: int, cmd_data: bytes,
+                            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send an encoded command and wait for the reply with its message ID."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = (command_type, future)
         try:
-            cmd_data = RobotProtocol.encode_command(CommandType.PING)
             await self.cmd_socket.send(cmd_data)
+            return await asyncio.wait_for(future, timeout or self.config.connect_timeout_s)
+        finally:
+            self._pending.pop(message_id, None)
+
+    async def request_state(self) -> Dict[str, Any]:
+        """Request a fresh state from the robot host and wait for it.
 
-            # Wait for pong response (with timeout)
-            start_time = time.time()
-            timeout = self.config.connect_timeout_s
+        Returns:
+            Current robot state dictionary, the cached state if the host did not reply
+        """
+        if self.connected:
+            try:
+                await self.request(CommandType.GET_STATE)
+            except asyncio.TimeoutError:
+                self.logger.warning("State request timed out")
+        return await self.get_state()
 
-            while time.time() - start_time < timeout:
-                try:
-                    # Check for response
-                    data = await asyncio.wait_for(
-                        self.data_socket.recv(),
-                        timeout=0.1
-                    )
-                    response = RobotProtocol.decode_response(data)
+    async def _ping_robot(self) -> bool:
+        """Ping the robot host to test connectivity.
 
-                    if response.get('response') == ResponseType.PONG.value:
-                        return True
+        Returns:
+            True if ping successful
+        """
+        try:
+            # Pings are always JSON and offer the serializers, hosts that do not negotiate keep JSON
+            message_id = self._next_message_id()
+            cmd_data = RobotProtocol().encode_command(
+                CommandType.PING, {'serializers': self._offered_serializers()}, message_id
+            )
+            response = await self._send_request(CommandType.PING, message_id, cmd_data)
+
+            if response.get('response') != ResponseType.PONG.value:
+                return False
 
-                except asyncio.TimeoutError:
-                    continue
-                except Exception:
-                    break
+            self._use_serializer(response.get('data', {}).get('serializer'))
+            return True
 
+        except asyncio.TimeoutError:
             return False
-
         except Exception as e:
             self.logger.error(f"Ping failed: {e}")
             return False
 
+    def _offered_serializers(self) -> List[str]:
+        """Get the serializers offered to the robot host, most preferred first."""
+        if self.config.serializer == 'auto':
+            return available_serializers()
+        return [self.config.serializer]
+
+    def _use_serializer(self, name: Optional[str]):
+        """Switch outgoing messages to the serializer chosen by the robot host."""
+        serializer = choose_serializer([name] if name else [])
+        if serializer is not self.protocol.serializer:
+            self.protocol = RobotProtocol(serializer)
+            self.logger.info(f"Using {serializer.name} serializer")
+
     async def _ping_loop(self):
         """Background task to periodically ping the robot host."""
         while self.connected:
@@ -379,8 +491,12 @@ class RemoteCore:
                 break
 
     async def _data_receiver_loop(self):
-        """Background task to receive data from robot host."""
-        while self.connected:
+        """Background task to receive data from robot host.
+
+        This is the only reader of the data socket: data-plane messages update
+        the caches, replies resolve the pending request with their message ID.
+        """
+        while self.data_socket is not None:
             try:
                 # Receive data with timeout
                 data = await asyncio.wait_for(
@@ -388,8 +504,15 @@ class RemoteCore:
                     timeout=self.config.polling_timeout_ms / 1000.0
                 )
 
+                # Binary video frames carry the JPEG bytes without an envelope
+                if self.protocol.is_binary_video_frame(data):
+                    video_data = self.protocol.decode_video_frame_binary(data)
+                    if video_data:
+                        self._store_video_frame(video_data, video_data['frame'])
+                    continue
+
                 # Decode response
-                response = RobotProtocol.decode_response(data)
+                response = self.protocol.decode_response(data)
 
                 # Process different response types
                 response_type = response.get('response')
@@ -403,15 +526,34 @@ class RemoteCore:
                 elif response_type == ResponseType.ERROR.value:
                     self.logger.warning(f"Robot host error: {response.get('data', {}).get('message', 'Unknown error')}")
 
-            except asyncio.TimeoutError:
+                self._resolve_request(response)
+
+            except (asyncio.TimeoutError, zmq.Again):
                 # Normal timeout - continue loop
                 continue
 
+            except asyncio.CancelledError:
+                break
+
             except Exception as e:
                 self.logger.error(f"Data receiver error: {e}")
                 # Brief pause before retrying
                 await asyncio.sleep(0.1)
 
+    def _resolve_request(self, response: Dict[str, Any]):
+        """Resolve the pending request a reply belongs to."""
+        message_id = response.get('id')
+        if message_id is None and response.get('response') == ResponseType.PONG.value:
+            # Hosts that do not echo message IDs: a pong answers every pending ping
+            for command_type, future in self._pending.values():
+                if command_type == CommandType.PING and not future.done():
+                    future.set_result(response)
+            return
+
+        command_type, future = self._pending.get(message_id, (None, None))
+        if future is not None and not future.done():
+            future.set_result(response)
+
     def _update_robot_state(self, state_data: Dict[str, Any]):
         """Update cached robot state from received data."""
         try:
@@ -428,18 +570,23 @@ class RemoteCore:
     def _update_video_frame(self, video_data: Dict[str, Any]):
         """Update cached video frame from received data."""
         try:
-            # Cache base64 frame
-            frame_b64 = video_data.get('frame')
-            if frame_b64:
-                self._last_frame_b64 = frame_b64
-
-                frame_bytes = RobotProtocol.decode_video_frame({'response': ResponseType.VIDEO.value, 'data': video_data})
-                if frame_bytes:
-                    self._last_frame_bytes = frame_bytes
+            # Decode the frame once and keep only the JPEG buffer
+            frame_bytes = self.protocol.decode_video_frame({'response': ResponseType.VIDEO.value, 'data': video_data})
+            if frame_bytes:
+                self._store_video_frame(video_data, frame_bytes)
 
         except Exception as e:
             self.logger.error(f"Failed to update video frame: {e}")
 
+    def _store_video_frame(self, video_data: Dict[str, Any], frame_bytes: bytes):
+        """Store a decoded JPEG frame in the frame store."""
+        self.frames.update(
+            video_data.get('camera_id', 'main'),
+            frame_bytes,
+            video_data.get('width', self.config.video_width),
+            video_data.get('height', self.config.video_height),
+        )
+
     async def __aenter__(self):
         """Async context manager entry."""
         await self.connect()
@@ -0,0 +1,129 @@
+"""
+Serializers for protocol messages.
+
+JSON is always available. msgpack and orjson are optional dependencies, a
+serializer whose package is not installed is simply not offered during the
+connection handshake. Decoding does not depend on the negotiated serializer:
+msgpack messages are told apart from JSON ones by their first byte, so
+messages sent before the handshake completed still decode.
+"""
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Serializer(ABC):
+    """Encodes protocol messages to bytes and back."""
+
+    name = ""
+    # Whether bytes values (e.g. JPEG frames) can be sent as is, without base64
+    supports_bytes = False
+
+    @abstractmethod
+    def dumps(self, message: Dict[str, Any]) -> bytes:
+        """Encode a message to bytes."""
+
+    @abstractmethod
+    def loads(self, raw_data: bytes) -> Dict[str, Any]:
+        """Decode bytes to a message."""
+
+
+class JsonSerializer(Serializer):
+    """Standard library JSON, the default and the handshake format."""
+
+    name = "json"
+
+    def dumps(self, message: Dict[str, Any]) -> bytes:
+        return json.dumps(message).encode('utf-8')
+
+    def loads(self, raw_data: bytes) -> Dict[str, Any]:
+        return json.loads(raw_data.decode('utf-8'))
+
+
+class OrjsonSerializer(Serializer):
+    """JSON encoded by orjson, wire compatible with `JsonSerializer`."""
+
+    name = "orjson"
+
+    def dumps(self, message: Dict[str, Any]) -> bytes:
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def loads(self, raw_data: bytes) -> Dict[str, Any]:
+        try:
+            return orjson.loads(raw_data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN and Infinity, which the json module writes for non-finite floats
+            return json.loads(raw_data.decode('utf-8'))
+
+
+class MsgpackSerializer(Serializer):
+    """Binary msgpack, smaller than JSON and carries bytes without base64."""
+
+    name = "msgpack"
+    supports_bytes = True
+
+    def dumps(self, message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def loads(self, raw_data: bytes) -> Dict[str, Any]:
+        return msgpack.unpackb(raw_data, raw=False)
+
+
+JSON = JsonSerializer()
+
+SERIALIZERS: Dict[str, Serializer] = {JSON.name: JSON}
+if orjson is not None:
+    SERIALIZERS[OrjsonSerializer.name] = OrjsonSerializer()
+if msgpack is not None:
+    SERIALIZERS[MsgpackSerializer.name] = MsgpackSerializer()
+
+# Preference order offered to robot hosts
+PREFERRED_SERIALIZERS = ("msgpack", "orjson", "json")
+
+
+def available_serializers() -> List[str]:
+    """Get the names of the installed serializers, most preferred first."""
+    return [name for name in PREFERRED_SERIALIZERS if name in SERIALIZERS]
+
+
+def get_serializer(name: str) -> Serializer:
+    """Get a serializer by name.
+
+    Raises:
+        ValueError: If the serializer is unknown or its package is not installed
+    """
+    serializer = SERIALIZERS.get(name)
+    if serializer is None:
+        raise ValueError(f"Serializer '{name}' is not available. Available: {available_serializers()}")
+    return serializer
+
+
+def choose_serializer(offered: List[str]) -> Serializer:
+    """Pick the first offered serializer that is installed, falling back to JSON."""
+    for name in offered:
+        if name in SERIALIZERS:
+            return SERIALIZERS[name]
+    return JSON
+
+
+def serializer_for(raw_data: bytes) -> Serializer:
+    """Detect the serializer of a received message.
+
+    JSON messages are objects and start with '{' (possibly after whitespace),
+    msgpack messages are maps and start with a map marker byte.
+    """
+    first = raw_data[:1]
+    if msgpack is not None and first and (0x80 <= first[0] <= 0x8f or first[0] in (0xde, 0xdf)):
+        return SERIALIZERS[MsgpackSerializer.name]
+    return SERIALIZERS.get(OrjsonSerializer.name, JSON)
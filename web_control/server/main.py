@@ -1,10 +1,11 @@
 import time
-import asyncio
 
 import socketio
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from api.rate_limit import rate_limiter
+from api.state_broadcast import state_broadcaster
 from api.streaming import video_manager
 from core.config import ServerConfig
 from core.remote_core import RemoteCore
@@ -19,29 +20,10 @@ print(config)
 # Create unified remote control core
 remote_core = RemoteCore(config)
 video_manager.attach_remote_core(remote_core)
+state_broadcaster.attach_remote_core(remote_core)
+state_broadcaster.rate_hz = config.state_push_hz
 
 
-def _init_client_state() -> dict:
-    now = time.time()
-    return {
-        'last_command_time': 0.0,
-        'command_count': 0,
-        'window_start': now,
-        'throttle_violations': 0,
-        'last_throttle_time': 0.0
-    }
-
-
-client_states: dict[str, dict] = {}
-
-RATE_LIMIT_CONFIG = {
-    'max_commands_per_second': 20,
-    'min_command_interval': 0.05,
-    'rate_limit_window': 1.0,
-    'throttle_penalty_duration': 2.0,
-    'max_throttle_violations': 3,
-}
-
 async def startup_event():
     print("Initializing remote control core...")
     success = await remote_core.connect()
@@ -157,74 +139,25 @@ async def get_camera_info():
     except Exception as e:
         return {"error": f"Get camera info failed: {str(e)}"}
 
-# Rate limiting and throttling functions
-def check_rate_limit(sid: str) -> bool:
-    """Check if client is within rate limits"""
-    current_time = time.time()
-    client_state = client_states.get(sid)
-
-    if not client_state:
-        return True
-
-    # Reset command count if window has passed
-    if current_time - client_state['window_start'] >= RATE_LIMIT_CONFIG['rate_limit_window']:
-        client_state['command_count'] = 0
-        client_state['window_start'] = current_time
-
-    return client_state['command_count'] < RATE_LIMIT_CONFIG['max_commands_per_second']
-
-def check_throttle(sid: str) -> bool:
-    """Check if client is throttling commands too fast"""
-    current_time = time.time()
-    client_state = client_states.get(sid)
-
-    if not client_state:
-        return True
-
-    # Check if client is in penalty period
-    if (client_state['throttle_violations'] >= RATE_LIMIT_CONFIG['max_throttle_violations'] and
-        current_time - client_state['last_throttle_time'] < RATE_LIMIT_CONFIG['throttle_penalty_duration']):
-        return False
-
-    # Reset violations if penalty period has passed
-    if current_time - client_state['last_throttle_time'] >= RATE_LIMIT_CONFIG['throttle_penalty_duration']:
-        client_state['throttle_violations'] = 0
-
-    # Check minimum interval between commands
-    if current_time - client_state['last_command_time'] < RATE_LIMIT_CONFIG['min_command_interval']:
-        client_state['throttle_violations'] += 1
-        client_state['last_throttle_time'] = current_time
-        return False
-
-    return True
-
-def update_client_state(sid: str, *, timestamp: float) -> None:
-    """Update client state after successful command"""
-    client_state = client_states.setdefault(sid, _init_client_state())
-    client_state['last_command_time'] = timestamp
-    client_state['command_count'] += 1
-
 @sio.event
 async def connect(sid, environ, auth):
     """Client connection event"""
     print(f"Client connected: {sid}")
-    # Initialize client state
-    client_states[sid] = _init_client_state()
+    # Every client starts with a full command budget
+    rate_limiter.add_client(sid)
     await sio.emit('connection_established', {'message': 'Connected to XLeRobot control server'}, to=sid)
+    # Robot state is pushed as 'state_update' events, starting with a full snapshot
+    await state_broadcaster.subscribe(sio, sid)
 
 @sio.event
 async def disconnect(sid):
     """Client disconnect event"""
     print(f"Client disconnected: {sid}")
 
-    if sid in video_manager.stream_tasks:
-        task = video_manager.stream_tasks[sid]
-        if not task.cancelled():
-            task.cancel()
-            print(f"Cancelled video stream task for disconnected client {sid}")
-        del video_manager.stream_tasks[sid]
+    video_manager.remove_viewer(sid)
+    state_broadcaster.unsubscribe(sid)
 
-    if client_states.pop(sid, None) is not None:
+    if rate_limiter.remove_client(sid):
         print(f"Cleaned up state for client {sid}")
 
 @sio.event
@@ -235,38 +168,26 @@ async def ping(sid, data):
 
 @sio.event
 async def move_command(sid, data):
-    """Movement command handler with rate limiting and throttling"""
+    """Movement command handler with token bucket rate limiting"""
     direction = data.get('direction')
     speed = data.get('speed', 1.0)
     timestamp = data.get('timestamp', time.time() * 1000)
 
     current_time = time.time()
 
-    # Check rate limiting
-    if not check_rate_limit(sid):
-        await sio.emit('command_received', {
-            'type': 'move',
-            'status': 'rate_limited',
-            'message': f'Rate limit exceeded: maximum {RATE_LIMIT_CONFIG["max_commands_per_second"]} commands per second',
-            'max_rate': RATE_LIMIT_CONFIG['max_commands_per_second'],
-            'client_timestamp': timestamp,
-            'server_timestamp': current_time * 1000
-        }, to=sid)
-        return
-
-    # Check throttling
-    if not check_throttle(sid):
-        client_state = client_states.setdefault(sid, _init_client_state())
-        await sio.emit('command_received', {
-            'type': 'move',
-            'status': 'throttled',
-            'message': f'Command throttled: minimum {RATE_LIMIT_CONFIG["min_command_interval"]*1000:.0f}ms interval required',
-            'min_interval': RATE_LIMIT_CONFIG['min_command_interval'] * 1000,
-            'violations': client_state['throttle_violations'],
-            'penalty_remaining': max(0, RATE_LIMIT_CONFIG['throttle_penalty_duration'] - (current_time - client_state['last_throttle_time'])) if client_state['throttle_violations'] >= RATE_LIMIT_CONFIG['max_throttle_violations'] else 0,
-            'client_timestamp': timestamp,
-            'server_timestamp': current_time * 1000
-        }, to=sid)
+    # Rejected commands are dropped, the client gets one notice per penalty window
+    allowed, notify = rate_limiter.acquire(sid)
+    if not allowed:
+        if notify:
+            await sio.emit('command_received', {
+                'type': 'move',
+                'status': 'throttled',
+                'message': f'Rate limit exceeded: maximum {rate_limiter.rate:.0f} commands per second',
+                'max_rate': rate_limiter.rate,
+                'retry_after': rate_limiter.retry_after(sid) * 1000,
+                'client_timestamp': timestamp,
+                'server_timestamp': current_time * 1000
+            }, to=sid)
         return
 
     if not remote_core.connected:
@@ -280,35 +201,16 @@ async def move_command(sid, data):
         return
 
     # Log command with rate limiting info
-    client_state = client_states.setdefault(sid, _init_client_state())
-    print(f"[{sid[:8]}] Move command: {direction} (speed={speed:.1f}) - count={client_state['command_count'] + 1}/{RATE_LIMIT_CONFIG['max_commands_per_second']}")
+    print(f"[{sid[:8]}] Move command: {direction} (speed={speed:.1f}) - budget={rate_limiter.remaining(sid)}/{rate_limiter.burst}")
 
-    # Execute robot command
+    # Execute robot command, state reaches the client through 'state_update' pushes
     try:
         result = await remote_core.move(direction, speed)
 
-        # Update client state after successful command
-        update_client_state(sid, timestamp=current_time)
-
-        # Get current robot state
-        robot_state = await remote_core.get_state()
-
-        # Calculate latency
-        latency = (current_time * 1000) - timestamp if timestamp else 0
-
-        # Send success response with detailed metrics
         await sio.emit('command_received', {
             'type': 'move',
             'direction': direction,
-            'speed': speed,
             'status': result.get('status', 'executed'),
-            'robot_state': robot_state,
-            'metrics': {
-                'latency': latency,
-                'commands_in_window': client_state['command_count'],
-                'max_commands': RATE_LIMIT_CONFIG['max_commands_per_second'],
-                'throttle_violations': client_state['throttle_violations']
-            },
             'client_timestamp': timestamp,
             'server_timestamp': current_time * 1000
         }, to=sid)
@@ -323,27 +225,37 @@ async def move_command(sid, data):
         }, to=sid)
 
 @sio.event
-async def start_video_stream(sid):
-    """Start video streaming"""
+async def start_video_stream(sid, data=None):
+    """Start video streaming
+
+    Options: 'camera_id' (defaults to the first camera), 'encoding'
+    (legacy base64 'video_frame' events by default, 'binary' opts into
+    'video_packet' events) and 'acks' (the client acknowledges every frame with
+    'video_frame_ack', frames are dropped for it while too many are
+    unacknowledged).
+    """
     print(f"Client {sid} requested start video stream")
-    
-    if sid in video_manager.stream_tasks:
-        task = video_manager.stream_tasks[sid]
-        if not task.cancelled():
-            task.cancel()
-        del video_manager.stream_tasks[sid]
-    
-    result = await video_manager.start_stream()
+    options = data or {}
+
+    result = await video_manager.start_stream(
+        sio,
+        sid,
+        camera_id=options.get('camera_id'),
+        binary=options.get('encoding', 'base64') == 'binary',
+        acks=bool(options.get('acks', False))
+    )
     await sio.emit('stream_status', result, to=sid)
-    
-    task = asyncio.create_task(video_manager.stream_frames(sio, sid))
-    video_manager.stream_tasks[sid] = task
+
+@sio.event
+async def video_frame_ack(sid, data=None):
+    """Video frame acknowledgement, frees a slot of the client's frame window"""
+    video_manager.frame_acked(sid)
 
 @sio.event
 async def stop_video_stream(sid):
     """Stop video streaming"""
     print(f"Client {sid} requested stop video stream")
-    result = await video_manager.stop_stream(sid)
+    result = await video_manager.stop_stream(sio, sid)
     await sio.emit('stream_status', result, to=sid)
 
 